@@ -0,0 +1,265 @@
+"""Concurrent-session load test of the Streamlit app against local servers, fully offline
+
+The harness starts `streamlit run main.py` on localhost and drives simulated
+visitors over the same websocket protocol the browser uses: every rerun sends
+the session's widget values and is timed until the server reports the script
+finished. Visitors switch language, search programs, subjects and raw rows,
+re-sort the raw data and prepare and fetch the downloads. Several server
+processes can share the visitors to model a multi-process deployment, and
+each concurrency level starts from freshly started servers.
+
+Usage: python -m benchmarks.loadtest [--sessions 1 4 16] [--actions 20] [--servers 1] [--output FILE]
+"""
+import argparse
+import ast
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from tornado.httpclient import AsyncHTTPClient
+
+from unidata.warmup import LANGUAGE_LABEL, LANGUAGE_OPTIONS, ScriptClient, warm_up
+
+SCRIPT = "main.py"
+DEFAULT_SESSIONS = [1, 2, 4, 8]
+PERCENTILES = (50, 90, 95, 99)
+# Steady-state p95 this many times the single-session p95 counts as degraded
+DEGRADED_RATIO = 2.0
+
+PROGRAM_QUERIES = ["მედიცინა", "business", "ბიზნეს", "law", "informatics", "ფსიქოლოგია", "enginering"]
+SUBJECT_QUERIES = ["math", "ისტორ", "chem", "ბიოლოგია"]
+ROW_QUERIES = ["tbilisi", "თბილისის", "medical", "ილიას", ""]
+
+
+def interface_labels(script=SCRIPT):
+    """The app's TRANSLATIONS dict, read from the script without running it"""
+    tree = ast.parse(Path(script).read_text(encoding="utf-8"))
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(target, "id", None) == "TRANSLATIONS" for target in node.targets):
+            return ast.literal_eval(node.value)
+    raise SystemExit(f"No TRANSLATIONS literal found in {script}")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Server:
+    """A `streamlit run` process on a free local port"""
+
+    def __init__(self, script=SCRIPT):
+        self.port = free_port()
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", script,
+             "--server.headless", "true", "--server.port", str(self.port),
+             "--server.address", "127.0.0.1", "--browser.gatherUsageStats", "false"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    async def ready(self, timeout=60):
+        client = AsyncHTTPClient()
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                await client.fetch(f"{self.url}/_stcore/health")
+                return
+            except Exception:
+                if self.process.poll() is not None:
+                    raise RuntimeError(f"streamlit exited with code {self.process.returncode}")
+                await asyncio.sleep(0.2)
+        raise TimeoutError(f"streamlit did not start on port {self.port}")
+
+    def peak_rss_mb(self):
+        """High-water mark of the server's resident memory, from /proc on Linux"""
+        try:
+            with open(f"/proc/{self.process.pid}/status", encoding="ascii") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            pass
+        return None
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+class Session:
+    """One simulated visitor on a ScriptClient, recording how long each rerun took"""
+
+    def __init__(self, server, labels, seed):
+        self.server = server
+        self.labels = labels
+        self.lang = "en"
+        self.random = random.Random(seed)
+        self.client = ScriptClient(server.port)
+        self.timings = []
+        self.errors = []
+
+    @property
+    def widgets(self):
+        return self.client.widgets
+
+    @property
+    def downloads(self):
+        return self.client.downloads
+
+    async def rerun(self, action, **changes):
+        seconds, errors = await self.client.rerun(**changes)
+        self.timings.append((action, seconds))
+        self.errors.extend(f"{action}: {error}" for error in errors)
+
+    def widget(self, element_type, key):
+        label = LANGUAGE_LABEL if key is None else self.labels[self.lang][key]
+        return self.client.widget(element_type, label)
+
+    async def switch_language(self):
+        self.lang = "ka" if self.lang == "en" else "en"
+        selector = self.widget("selectbox", None)
+        await self.rerun("language", **{selector.id: ("string_value", LANGUAGE_OPTIONS[self.lang])})
+
+    async def search(self, key, queries, action):
+        box = self.widget("text_input", key)
+        await self.rerun(action, **{box.id: ("string_value", self.random.choice(queries))})
+
+    async def sort_rows(self):
+        sort_by = self.widget("selectbox", "sort_by")
+        await self.rerun("sort", **{sort_by.id: ("string_value", self.random.choice(list(sort_by.options)))})
+        order = self.widget("radio", "sort_order")
+        await self.rerun("sort_order", **{order.id: ("int_value", self.random.randrange(len(order.options)))})
+
+    async def download(self):
+        client = AsyncHTTPClient()
+        for button in [proto for (kind, _), proto in self.widgets.items() if kind == "button"]:
+            await self.rerun("prepare_download", **{button.id: ("trigger_value", True)})
+            for url in self.downloads:
+                start = time.perf_counter()
+                await client.fetch(self.server.url + url, request_timeout=300)
+                self.timings.append(("fetch_download", time.perf_counter() - start))
+
+    async def run(self, actions, think):
+        try:
+            await self.client.connect()
+            await self.rerun("open")
+            for _ in range(actions):
+                await self.random.choice([
+                    self.switch_language,
+                    lambda: self.search("search_programs", PROGRAM_QUERIES, "search_programs"),
+                    lambda: self.search("search_subjects", SUBJECT_QUERIES, "search_subjects"),
+                    lambda: self.search("search_rows", ROW_QUERIES, "search_rows"),
+                    self.sort_rows,
+                    self.download,
+                ])()
+                if think:
+                    await asyncio.sleep(self.random.uniform(0, 2 * think))
+        except Exception as error:
+            self.errors.append(repr(error))
+        finally:
+            self.client.close()
+
+
+def summarize(latencies):
+    """Count, mean and percentiles of latencies in milliseconds"""
+    values = np.asarray(latencies) * 1000
+    if not len(values):
+        return {"count": 0}
+    summary = {"count": len(values), "mean_ms": float(values.mean()), "max_ms": float(values.max())}
+    summary.update({f"p{q}_ms": float(np.percentile(values, q)) for q in PERCENTILES})
+    return summary
+
+
+async def run_level(sessions, args, labels):
+    """One concurrency level against freshly started servers"""
+    servers = [Server() for _ in range(args.servers)]
+    try:
+        await asyncio.gather(*(server.ready() for server in servers))
+        if args.warm:
+            await asyncio.gather(*(warm_up(server.port) for server in servers))
+        clients = [Session(servers[i % len(servers)], labels, args.seed + i) for i in range(sessions)]
+        start = time.perf_counter()
+        await asyncio.gather(*(client.run(args.actions, args.think) for client in clients))
+        wall = time.perf_counter() - start
+        peak_rss = [server.peak_rss_mb() for server in servers]
+    finally:
+        for server in servers:
+            server.stop()
+
+    timings = [timing for client in clients for timing in client.timings]
+    reruns = [(action, elapsed) for action, elapsed in timings if action != "fetch_download"]
+    by_action = {}
+    for action, elapsed in timings:
+        by_action.setdefault(action, []).append(elapsed)
+    return {
+        "sessions": sessions,
+        "servers": len(servers),
+        "reruns": len(reruns),
+        "throughput_per_second": len(reruns) / wall,
+        # A session's first rerun pays for cold caches, so it is reported apart
+        "open": summarize(by_action.get("open", [])),
+        "steady": summarize([elapsed for action, elapsed in reruns if action != "open"]),
+        "actions": {action: summarize(values) for action, values in by_action.items()},
+        "peak_rss_mb": peak_rss,
+        "errors": [error for client in clients for error in client.errors],
+    }
+
+
+async def run_levels(args):
+    labels = interface_labels()
+    levels = []
+    print(f"{'sessions':>8} {'reruns':>7} {'rerun/s':>8} {'open p50':>9} {'p50':>8} {'p95':>8} {'p99':>8} "
+          f"{'peak RSS MB':>12}")
+    for sessions in args.sessions:
+        level = await run_level(sessions, args, labels)
+        levels.append(level)
+        steady, first = level["steady"], levels[0]["steady"]
+        degraded = len(levels) > 1 and steady.get("p95_ms", 0) > DEGRADED_RATIO * first.get("p95_ms", 0)
+        rss = "/".join(f"{value:.0f}" if value else "?" for value in level["peak_rss_mb"])
+        print(f"{sessions:>8} {level['reruns']:>7} {level['throughput_per_second']:>8.1f} "
+              f"{level['open'].get('p50_ms', 0):>7.0f}ms {steady.get('p50_ms', 0):>6.0f}ms "
+              f"{steady.get('p95_ms', 0):>6.0f}ms {steady.get('p99_ms', 0):>6.0f}ms {rss:>12}"
+              f"{'  degraded' if degraded else ''}", flush=True)
+        for error in level["errors"]:
+            print(f"  error: {error}")
+    return levels
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.loadtest", description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=DEFAULT_SESSIONS,
+                        help="concurrent session counts to try (default: %(default)s)")
+    parser.add_argument("--actions", type=int, default=20, help="interactions per session after opening the app")
+    parser.add_argument("--servers", type=int, default=1, help="server processes sharing the sessions")
+    parser.add_argument("--think", type=float, default=0.0, help="mean pause between interactions in seconds")
+    parser.add_argument("--warm", action="store_true", help="warm each server up before the sessions start")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the full results as JSON")
+    args = parser.parse_args(argv)
+
+    if not Path(SCRIPT).exists():
+        raise SystemExit(f"Run from the directory containing {SCRIPT}")
+    levels = asyncio.run(run_levels(args))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"script": SCRIPT, "pid": os.getpid(), "levels": levels}, f, indent=2)
+    return 1 if any(level["errors"] for level in levels) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+"""Per-stage benchmarks of the data pipeline on synthetic data of growing size
+
+Each stage runs on the output of the one before it, exactly as the app chains
+them: loading all rows or only the ranking columns from the Parquet snapshot,
+compaction, translation, the grant total aggregations, per-language rankings,
+search indexes, the filter index and a cross-filtered ranking, the score
+distributions of every group, the raw data sort and paging, and CSV export.
+Results are written as JSON so two commits can be compared.
+
+Usage:
+    python -m benchmarks.pipeline run [--rows 10000 100000 1000000] [--stages ...] [--output FILE]
+    python -m benchmarks.pipeline compare BASELINE.json CURRENT.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_grants
+from unidata.aggregation import THRESHOLDS, base_aggregates
+from unidata.compact import compact_frame
+from unidata.crossfilter import VIEW_DIMENSIONS, BitmapIndex, filtered_table, view_filters
+from unidata.distributions import GROUP_KEYS, score_distributions
+from unidata.exports import export_bytes
+from unidata.ingest import file_hash, snapshot_path
+from unidata.pipeline import apply_translations, load_analysis_rows, load_rows, localize
+from unidata.rawdata import RowBrowser
+from unidata.search import build_search_indexes
+from unidata.translations import read_translations
+from unidata.uncertainty import INTERVALS
+
+RESULTS_DIR = Path("benchmarks") / "results"
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000]
+# Columns the raw data tab is most often sorted by
+SORT_COLUMNS = ["საკონკ. ქულა", "უსდ", "პროგრამა"]
+# A stage this much slower than the baseline is reported as a regression
+REGRESSION_RATIO = 1.2
+
+
+def _snapshot(data, directory):
+    """Write data where read_grants looks for the snapshot of a stand-in workbook"""
+    source = Path(directory) / "grants.xlsx"
+    source.write_bytes(f"synthetic {len(data)} rows".encode())
+    target = snapshot_path(source, file_hash(source))
+    target.parent.mkdir(parents=True, exist_ok=True)
+    data.to_parquet(target, index=False)
+    return source
+
+
+class Inputs:
+    """Outputs of earlier stages that a stage starts from, computed on first use"""
+
+    def __init__(self, source, translations):
+        self.source = source
+        self.translations = translations
+
+    def relabel(self, table):
+        return apply_translations(table, "en", self.translations)
+
+    @cached_property
+    def rows(self):
+        return load_rows(self.source)
+
+    @cached_property
+    def translated(self):
+        return self.relabel(self.rows)
+
+    @cached_property
+    def base(self):
+        return base_aggregates(self.rows)
+
+    @cached_property
+    def filter_index(self):
+        return BitmapIndex(self.translated)
+
+    @cached_property
+    def browser(self):
+        browser = RowBrowser(self.translated)
+        for col in SORT_COLUMNS:
+            browser.order(col, False)
+        return browser
+
+
+def sort_columns(inputs):
+    browser = RowBrowser(inputs.translated)
+    return [browser.order(col, False) for col in SORT_COLUMNS]
+
+
+def filter_views(inputs):
+    # One university and a score range, as a click and the score slider set them
+    index = inputs.filter_index
+    filters = {"უსდ": [index.values["უსდ"][0]], "საკონკ. ქულა": (1700, 2000)}
+    return [filtered_table(index, inputs.translated, view, view_filters(filters, view), THRESHOLDS[view])
+            for view in VIEW_DIMENSIONS]
+
+
+def first_page(inputs):
+    # One page of the default view, with the sort orders already cached
+    return inputs.browser.page(list(inputs.translated.columns), SORT_COLUMNS[0], False, 0, 100)
+
+
+# Stages in pipeline order
+STAGES = {
+    "load": lambda inputs: load_rows(inputs.source),
+    "project": lambda inputs: load_analysis_rows(inputs.source),
+    "compact": lambda inputs: compact_frame(inputs.rows),
+    "translate": lambda inputs: inputs.relabel(inputs.rows),
+    "aggregate": lambda inputs: base_aggregates(inputs.rows),
+    "localize": lambda inputs: [
+        localize(inputs.base, lang, inputs.translations, THRESHOLDS)
+        for lang in ("en", "ka")
+    ],
+    "search": lambda inputs: build_search_indexes(inputs.base, inputs.relabel),
+    "index": lambda inputs: BitmapIndex(inputs.translated),
+    "filter": filter_views,
+    "distribute": lambda inputs: [
+        score_distributions(inputs.translated, by)
+        for by in GROUP_KEYS.values()
+    ],
+    "sort": sort_columns,
+    "page": first_page,
+    "export": lambda inputs: export_bytes(inputs.translated, "csv"),
+}
+# Inputs each stage reads, prepared before its timer starts
+STAGE_INPUTS = {
+    "compact": ["rows"], "translate": ["rows"], "aggregate": ["rows"], "localize": ["base"],
+    "search": ["base"], "index": ["translated"], "filter": ["filter_index"], "distribute": ["translated"],
+    "sort": ["translated"], "page": ["browser"], "export": ["translated"],
+}
+# Process-wide caches a stage fills, emptied before each of its runs so that every run is timed cold
+STAGE_CACHES = {"localize": [INTERVALS], "filter": [INTERVALS]}
+
+
+def timed(func, repeat, caches=()):
+    """Last result, best and mean wall time of repeat calls, each starting with the caches empty"""
+    times = []
+    for _ in range(repeat):
+        for cache in caches:
+            cache.clear()
+        gc.collect()
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return result, min(times), sum(times) / len(times)
+
+
+def run_size(rows, stages, repeat, seed, translations):
+    """Timings of the selected stages on rows synthetic students"""
+    data = synthetic_grants(rows, seed)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        inputs = Inputs(_snapshot(data, directory), translations)
+        del data
+        for name in (name for name in STAGES if name in stages):
+            for attribute in STAGE_INPUTS.get(name, []):
+                getattr(inputs, attribute)
+            _, best, mean = timed(lambda: STAGES[name](inputs), repeat, STAGE_CACHES.get(name, ()))
+            results.append({
+                "stage": name,
+                "rows": rows,
+                "best_seconds": best,
+                "mean_seconds": mean,
+                "repeat": repeat,
+                "rows_per_second": rows / best if best else None,
+            })
+            print(f"{rows:>10,} {name:<10} {best * 1000:>10.1f} ms", flush=True)
+    return results
+
+
+def environment():
+    """Commit and library versions the results were measured with"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                    capture_output=True, text=True).stdout.strip())
+    except OSError:
+        commit, dirty = "", False
+    return {
+        "commit": commit or None,
+        "dirty": dirty,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def run(args):
+    stages = args.stages or list(STAGES)
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        raise SystemExit(f"Unknown stages: {', '.join(sorted(unknown))}, choose from {', '.join(STAGES)}")
+    translations = read_translations(args.translations)
+
+    report = environment()
+    report.update({"seed": args.seed, "results": []})
+    for rows in args.rows:
+        report["results"].extend(run_size(rows, stages, args.repeat, args.seed, translations))
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{report['commit'] or 'results'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {output}")
+    return 0
+
+
+def compare(args):
+    def load(path):
+        with open(path, "r", encoding="utf-8") as f:
+            report = json.load(f)
+        return report, {(r["stage"], r["rows"]): r["best_seconds"] for r in report["results"]}
+
+    baseline, before = load(args.baseline)
+    current, after = load(args.current)
+    print(f"{'stage':<10} {'rows':>10} {baseline['commit'] or 'baseline':>12} {current['commit'] or 'current':>12} {'ratio':>7}")
+    regressions = 0
+    for key in sorted(before.keys() & after.keys(), key=lambda key: (list(STAGES).index(key[0]), key[1])):
+        ratio = after[key] / before[key] if before[key] else float("inf")
+        flag = "  slower" if ratio > args.threshold else ""
+        regressions += bool(flag)
+        print(f"{key[0]:<10} {key[1]:>10,} {before[key] * 1000:>10.1f}ms {after[key] * 1000:>10.1f}ms {ratio:>6.2f}x{flag}")
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.pipeline", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="time each stage at each size and write the results as JSON")
+    run_parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS, help="synthetic dataset sizes")
+    run_parser.add_argument("--stages", nargs="+", help=f"stages to time (default: all of {', '.join(STAGES)})")
+    run_parser.add_argument("--repeat", type=int, default=3, help="runs per stage, the best one is reported")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--translations", default=".", help="directory of universities.json and programs.json")
+    run_parser.add_argument("--output", help=f"JSON file to write (default: {RESULTS_DIR}/<commit>.json)")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser("compare", help="compare two result files stage by stage")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=REGRESSION_RATIO,
+                                help="slowdown ratio reported as a regression (default: %(default)s)")
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""Cold-start report of the app, with a budget check for autoscaled replicas
+
+Two measurements, both from fresh processes:
+
+- imports: main.py's top-level imports replayed in a new interpreter under
+  `python -X importtime`, summed per top-level package. Streamlit itself is
+  imported before the marker, since the server has loaded it before the
+  script first runs, so the rest is what the script adds to a cold start.
+- cold start: a fresh `streamlit run` server and one visitor opening the app,
+  timed from launching the process to the server answering its health check,
+  to the first rendered element and to the whole first page.
+
+Exits non-zero when the median time from launch to the first page exceeds the
+budget, set with --budget or UNIDATA_STARTUP_BUDGET.
+
+Usage: python -m benchmarks.startup [--repeat 3] [--budget SECONDS] [--output FILE]
+"""
+import argparse
+import ast
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.loadtest import SCRIPT, Server
+from unidata.warmup import ScriptClient
+
+DEFAULT_BUDGET = 8.0
+MARKER = "startup: script imports"
+TOP_PACKAGES = 12
+
+
+def script_imports(script=SCRIPT):
+    """Modules imported at the top level of the script, in order"""
+    tree = ast.parse(Path(script).read_text(encoding="utf-8"))
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            modules.append(node.module)
+    return modules
+
+
+def import_times(modules):
+    """Self import time per top-level package in seconds, and the total, of modules imported after streamlit"""
+    code = ("import sys, streamlit, streamlit.web.bootstrap\n"
+            f"sys.stderr.write({MARKER!r} + '\\n')\n"
+            + "".join(f"import {module}\n" for module in modules))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, check=True)
+    lines = result.stderr.splitlines()
+    packages = {}
+    for line in lines[lines.index(MARKER) + 1:]:
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        own, _, name = line[len("import time:"):].split("|")
+        if not own.strip().isdigit():
+            continue
+        package = name.strip().split(".")[0]
+        packages[package] = packages.get(package, 0.0) + int(own) / 1e6
+    return dict(sorted(packages.items(), key=lambda item: -item[1])), sum(packages.values())
+
+
+async def cold_start(script=SCRIPT):
+    """Seconds from launching a server to its health check, the first element and the first page"""
+    launched = time.perf_counter()
+    server = Server(script)
+    try:
+        await server.ready()
+        ready = time.perf_counter() - launched
+        client = ScriptClient(server.port)
+        await client.connect()
+        try:
+            opened = time.perf_counter() - launched
+            seconds, errors = await client.rerun()
+        finally:
+            client.close()
+    finally:
+        server.stop()
+    if errors:
+        raise RuntimeError(f"the first run raised: {errors[0]}")
+    return {
+        "server_ready": ready,
+        "first_element": opened + (client.first_element or seconds),
+        "first_page": opened + seconds,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.startup", description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3, help="cold starts to time, the median is checked")
+    parser.add_argument("--budget", type=float, default=float(os.environ.get("UNIDATA_STARTUP_BUDGET", DEFAULT_BUDGET)),
+                        help="seconds from launch to the first page (default: UNIDATA_STARTUP_BUDGET or %(default)s)")
+    parser.add_argument("--output", help="write the report as JSON")
+    args = parser.parse_args(argv)
+
+    if not Path(SCRIPT).exists():
+        raise SystemExit(f"Run from the directory containing {SCRIPT}")
+
+    packages, total = import_times(script_imports())
+    print(f"Script imports after streamlit: {total * 1000:.0f} ms")
+    for package, seconds in list(packages.items())[:TOP_PACKAGES]:
+        print(f"  {package:<24} {seconds * 1000:8.1f} ms")
+
+    runs = [asyncio.run(cold_start()) for _ in range(args.repeat)]
+    median = {key: float(np.median([run[key] for run in runs])) for key in runs[0]}
+    print(f"Cold start, median of {len(runs)}:")
+    for key, seconds in median.items():
+        print(f"  {key:<24} {seconds * 1000:8.0f} ms")
+
+    over = median["first_page"] > args.budget
+    print(f"First page after {median['first_page']:.2f}s, budget {args.budget:.2f}s: {'OVER BUDGET' if over else 'ok'}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"imports": packages, "import_seconds": total, "runs": runs, "median": median,
+                       "budget_seconds": args.budget}, f, indent=2)
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""Synthetic student rows with the schema and rough distributions of grants.xlsx
+
+Universities and programs come from universities.json and programs.json when
+they exist, so cardinalities and translation hit rates match the real data;
+without them a made-up catalog of the same size is used. Program sizes are
+heavy-tailed like the real ones, and grant levels, scores and subjects follow
+the shares of the 2025 release.
+
+Usage: python -m benchmarks.synthetic ROWS OUTPUT.parquet [--seed N]
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from unidata.translations import read_translation_files
+
+# Shares in the 2025 release, None standing for an empty cell
+SUBJECTS = {
+    "ისტორია": 0.455, "მათემატიკა": 0.311, "ზოგადი უნარები": 0.054, "ქიმია": 0.047,
+    "სამოქალაქო განათლება": 0.032, "გეოგრაფია": 0.026, "ბიოლოგია": 0.025, "ლიტერატურა": 0.021,
+    "ფიზიკა": 0.010, "ხელოვნება": 0.004, None: 0.015,
+}
+FOREIGN_LANGUAGES = {"ინგლისური ენა": 0.966, "რუსული ენა": 0.028, "გერმანული ენა": 0.005, "ფრანგული ენა": 0.001}
+SECOND_SUBJECT = "ბიოლოგია"
+SECOND_SUBJECT_SHARE = 0.048
+PREPARATORY_SHARE = 0.054
+# No grant, 50%, 70% and 100% among academic students
+GRANT_SHARES = (0.782, 0.136, 0.049, 0.033)
+# Preparatory students either get the full grant or none
+PREPARATORY_FULL_GRANT = 0.45
+
+UNIVERSITY_COUNT = 56
+PROGRAM_COUNT = 1460
+
+
+def catalog(translations_dir=".", seed=0):
+    """University code, university, program code and program of every program"""
+    universities_trans, programs_trans = read_translation_files(translations_dir)
+    codes = {name.strip(): entry.get("code") for name, entry in universities_trans.items()}
+    rows = []
+    for entry in programs_trans.values():
+        code = codes.get(str(entry.get("university", "")).strip())
+        if code is not None and "program_code" in entry and "georgian" in entry:
+            rows.append((code, entry["university"], entry["program_code"], entry["georgian"]))
+    if rows:
+        return pd.DataFrame(rows, columns=["უსდ კოდი", "უსდ", "პროგ. კოდი", "პროგრამა"]).drop_duplicates()
+
+    # Made-up catalog: a few large universities and many small ones, names repeating across them
+    rng = np.random.default_rng(seed)
+    university = np.sort(rng.zipf(1.6, PROGRAM_COUNT) % UNIVERSITY_COUNT + 1)
+    name = rng.integers(0, PROGRAM_COUNT // 3, PROGRAM_COUNT)
+    return pd.DataFrame({
+        "უსდ კოდი": university,
+        "უსდ": [f"უნივერსიტეტი {code}" for code in university],
+        "პროგ. კოდი": university * 100000 + np.arange(PROGRAM_COUNT),
+        "პროგრამა": [f"პროგრამა {n}" for n in name],
+    })
+
+
+def _choice(rng, shares, size):
+    """Values drawn with the given shares, as an object array"""
+    values = np.asarray(list(shares), dtype=object)
+    weights = np.asarray(list(shares.values()))
+    return values[rng.choice(len(values), size, p=weights / weights.sum())]
+
+
+def _scores(rng, raw, scaled, size):
+    """Whole-number raw scores and scaled scores that grow with them
+
+    raw is (mean, spread, lowest, highest) and scaled is (mean, spread).
+    """
+    mean, spread, low, high = raw
+    values = np.clip(np.rint(rng.normal(mean, spread, size)), low, high)
+    z = (values - mean) / spread + rng.normal(0, 0.2, size)
+    return values, np.round(scaled[0] + z * scaled[1], 1)
+
+
+def synthetic_grants(rows, seed=0, translations_dir="."):
+    """rows synthetic students with the columns and dtypes read_grants returns"""
+    rng = np.random.default_rng(seed)
+    programs = catalog(translations_dir, seed)
+
+    # Heavy-tailed program sizes, rows ordered by program like the published list
+    popularity = rng.lognormal(0, 1.4, len(programs))
+    program = np.sort(rng.choice(len(programs), rows, p=popularity / popularity.sum()))
+    data = {col: programs[col].to_numpy()[program] for col in programs.columns}
+    data["უსდ"] = data["უსდ"].astype(object)
+    data["პროგრამა"] = data["პროგრამა"].astype(object)
+    data["საგამოცდო"] = 500000000 + rng.choice(12000000, rows, replace=False).astype(np.int64)
+
+    preparatory = rng.random(rows) < PREPARATORY_SHARE
+    # Preparatory students have no Georgian or foreign language results
+    georgian_raw, georgian_scaled = _scores(rng, (41, 10, 2, 60), (152.6, 11), rows)
+    foreign_raw, foreign_scaled = _scores(rng, (50, 13, 9, 70), (152.2, 11), rows)
+    foreign = _choice(rng, FOREIGN_LANGUAGES, rows)
+    foreign[preparatory] = None
+    data["ქართული ენა ნედლი ქულა"] = pd.array(np.where(preparatory, np.nan, georgian_raw)).astype("Int64")
+    data["ქართული ენა სკალ."] = np.where(preparatory, np.nan, georgian_scaled)
+    data["უცხო ენა"] = foreign
+    data["უცხო ენა ნედლი ქულა"] = pd.array(np.where(preparatory, np.nan, foreign_raw)).astype("Int64")
+    data["უცხო ენა სკალ."] = np.where(preparatory, np.nan, foreign_scaled)
+
+    subject = _choice(rng, SUBJECTS, rows)
+    elective_raw, elective_scaled = _scores(rng, (30, 12, 10, 74), (153.5, 15), rows)
+    no_subject = pd.isna(subject)
+    data["არჩევითი საგანი 1"] = subject
+    data["არჩევითი ნედლი ქულა"] = np.where(no_subject, np.nan, elective_raw)
+    data["არჩევითი სკალ."] = np.where(no_subject, np.nan, elective_scaled)
+
+    second = rng.random(rows) < SECOND_SUBJECT_SHARE
+    second_raw, second_scaled = _scores(rng, (40, 10, 18, 70), (150, 11), rows)
+    data["არჩევითი საგანი 2"] = np.where(second, SECOND_SUBJECT, None)
+    data["არჩევითი 2 ნედლი ქულა"] = np.where(second, second_raw, np.nan)
+    data["არჩევითი 2 სკალ."] = np.where(second, second_scaled, np.nan)
+
+    scaled = [np.nan_to_num(data[col], nan=150.0) for col in ["ქართული ენა სკალ.", "უცხო ენა სკალ.", "არჩევითი სკალ."]]
+    data["საკონკ. ქულა"] = np.round(3 * scaled[0] + 3 * scaled[1] + 6 * scaled[2], 1)
+
+    # Each university leans towards more or fewer grants than the overall shares
+    university = pd.factorize(data["უსდ კოდი"])[0]
+    tilt = rng.lognormal(0, 0.5, university.max() + 1)[university]
+    tilt /= tilt.mean()
+    granted = 1 - GRANT_SHARES[0]
+    cumulative = np.cumsum(GRANT_SHARES[1:]) / granted
+    draw = rng.random(rows)
+    level = np.where(draw < granted * np.minimum(tilt, 1 / granted), np.searchsorted(cumulative, rng.random(rows)) + 1, 0)
+    grant = np.array([np.nan, 50.0, 70.0, 100.0])[level]
+    full = rng.random(rows) < PREPARATORY_FULL_GRANT
+    data["გრანტი %"] = np.where(preparatory, np.where(full, 100.0, np.nan), grant)
+
+    data["არჩევანი"] = np.minimum(rng.geometric(0.78, rows), 53).astype(np.int64)
+    data["აკად/მოსამზად"] = np.where(preparatory, "მოსამზ", "აკად").astype(object)
+    return pd.DataFrame(data)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.synthetic", description=__doc__.splitlines()[0])
+    parser.add_argument("rows", type=int)
+    parser.add_argument("output", help="Parquet file to write")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--translations", default=".", help="directory of universities.json and programs.json")
+    args = parser.parse_args(argv)
+    synthetic_grants(args.rows, args.seed, args.translations).to_parquet(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
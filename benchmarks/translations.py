@@ -0,0 +1,62 @@
+"""Benchmark of the vectorized translation against the previous row-wise version
+
+Usage: python -m benchmarks.translations [scale ...]   (default scales: 1 10 100)
+"""
+import sys
+import time
+
+import pandas as pd
+
+from unidata.ingest import read_grants
+from unidata.translations import SUBJECT_TRANSLATIONS, read_translation_files, read_translations, translate_frame
+
+
+def rowwise_translate(data, universities_trans, programs_trans):
+    """The apply/map based translation main.py used before, kept as the reference output"""
+    data_translated = data.copy()
+    if programs_trans:
+        def translate_program(row):
+            key = f"{row['უსდ']}_{row['პროგ. კოდი']}"
+            return programs_trans.get(key, {}).get("english", row["პროგრამა"])
+
+        data_translated["პროგრამა"] = data_translated.apply(translate_program, axis=1)
+
+    for col in ["არჩევითი საგანი 1", "არჩევითი საგანი 2"]:
+        if col in data_translated.columns:
+            data_translated[col] = data_translated[col].map(
+                lambda x: SUBJECT_TRANSLATIONS.get(x, x) if pd.notna(x) else x
+            )
+
+    if universities_trans:
+        data_translated["უსდ"] = data_translated["უსდ"].map(
+            lambda x: universities_trans.get(x, {}).get("english", x)
+        )
+    return data_translated
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main(scales):
+    data = read_grants()
+    data = data[data["აკად/მოსამზად"] == "აკად"]
+    universities_trans, programs_trans = read_translation_files()
+    translations = read_translations()
+    # Read the compiled table up front, its load is not part of translating
+    translations.programs
+
+    print(f"{'rows':>10} {'row-wise s':>11} {'vectorized s':>13} {'speedup':>8}  identical")
+    for scale in scales:
+        scaled = pd.concat([data] * scale, ignore_index=True)
+        expected, rowwise_time = timed(rowwise_translate, scaled, universities_trans, programs_trans)
+        actual, vector_time = timed(translate_frame, scaled, translations)
+        identical = expected.to_csv(index=False).encode() == actual.to_csv(index=False).encode()
+        print(f"{len(scaled):>10} {rowwise_time:>11.3f} {vector_time:>13.3f} "
+              f"{rowwise_time / vector_time:>7.1f}x  {identical}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1, 10, 100])
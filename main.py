@@ -1,8 +1,32 @@
-import streamlit as st
+import functools
+from pathlib import Path
+
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import json
+import streamlit as st
+
+from unidata.aggregation import MONEY_COLUMN, RANKINGS, THRESHOLDS, GrantCube, base_aggregates, rank
+from unidata.cache import LRUCache
+from unidata.crossfilter import (
+    FILTER_COLUMNS, SCORE_BINS, VIEW_DIMENSIONS, BitmapIndex, filtered_table, view_filters,
+)
+from unidata.distributions import GROUP_KEYS, SCORE_COLUMNS, score_distributions
+from unidata.exports import EXPORT_FORMATS, export_bytes, summary_bundle
+from unidata.figures import FIGURE_FILTERS, build_figures, score_distribution_lines
+from unidata.ingest import as_written, source_columns, source_version
+from unidata.metrics import recorder
+from unidata.pipeline import (
+    apply_translations, load_analysis_rows, load_artifacts, load_rows, localize, translate_column, translate_columns
+)
+from unidata.rawdata import PAGE_SIZES, RowBrowser
+from unidata.search import build_search_indexes, select_ranked
+from unidata.settings import COMPACT, OPERATOR, SHARED, VIEW_MODE
+from unidata.shared import freeze_frame
+from unidata.translations import read_translations
+from unidata.uncertainty import INTERVALS
+from unidata.years import translations_dir, year_over_year, year_sources, year_totals
+
+# Stages of this rerun share its run number; a no-op unless UNIDATA_METRICS is set
+run = recorder.begin_run()
 
 st.set_page_config(
     page_title="2025 Georgian University Grant Data Analysis | Rankings & Statistics",
@@ -89,11 +113,15 @@ st.markdown("""
 # Language translations
 TRANSLATIONS = {
     "en": {
-        "title": "📊 2025 Georgian University Grant Data Analysis",
+        "title": "📊 {year} Georgian University Grant Data Analysis",
         "language": "Language",
+        "view": "View",
+        "year": "Year",
         "university_level": "🏛️ University Level",
         "program_level": "📚 Program Level",
         "subject_level": "📖 Subject Level",
+        "score_distributions": "📉 Score Distributions",
+        "year_over_year": "📈 Year over Year",
         "raw_data": "📋 Raw Data",
         "methodology": "📖 Methodology",
         "university_analysis": "University Level Analysis",
@@ -117,6 +145,7 @@ TRANSLATIONS = {
         "subject_details": "Subject Details Table",
         "search_programs": "Search programs:",
         "search_subjects": "Search subjects:",
+        "search_rows": "Search programs or universities:",
         "raw_data_view": "Raw Data View",
         "select_columns": "Select Columns to Display",
         "choose_columns": "Choose columns to display:",
@@ -124,105 +153,61 @@ TRANSLATIONS = {
         "sort_order": "Sort order:",
         "descending": "Descending",
         "ascending": "Ascending",
-        "download_csv": "Download filtered data as CSV",
+        "page_size": "Rows per page:",
+        "page": "Page:",
+        "showing_rows": "Showing rows {start:,}–{end:,} of {total:,}",
+        "download_csv": "Download filtered data",
+        "export_format": "File format:",
+        "prepare_download": "Prepare download",
+        "summary_downloads": "Summary Tables",
+        "download_summaries": "Download university, program and subject tables (ZIP)",
+        "year_over_year_analysis": "Year over Year Comparison",
+        "compared_with": "{year} compared with {previous}. Changes are {year} minus {previous}, average grant changes in percentage points.",
+        "no_earlier_year": "No year before {year} is available, so there is nothing to compare with.",
+        "uni_year_over_year": "Universities",
+        "program_year_over_year": "Programs",
         "summary_stats": "Summary Statistics",
         "total_records": "Total Records",
         "universities": "Universities",
         "50_grant": "50% Grant",
         "70_grant": "70% Grant",
         "100_grant": "100% Grant",
-        "methodology_content": """
-        ## Data Source and Scope
-        
-        This dashboard analyzes grant allocation data for Georgian universities from the **National Assessment and Examinations Center (NAEC)**.
-        
-        **Data Source**: ჩარიცხულთა სია მოპოვებული სახელმწიფო სასწავლო გრანტის მითითებით – აკადემიური (საბაკალავრო) პროგრამები და ქართულ ენაში მომზადების საგანმანათლებლო პროგრამები
-        
-        **Source URL**: [https://edu.aris.ge/news/2025-wels-charicxulta-ranjirebuli-sia-fakultetebisa-da-archeviti-sagnebis-mixedvit.html](https://edu.aris.ge/news/2025-wels-charicxulta-ranjirebuli-sia-fakultetebisa-da-archeviti-sagnebis-mixedvit.html)
-        
-        **⚠️ Important Disclaimer**: This data should not be considered as a single determining indicator of university or program quality. The analysis is based on grant allocation data only and may contain flaws or limitations. Multiple factors should be considered when evaluating educational institutions and programs.
-        
-        The analysis focuses specifically on:
-        - **Academic programs only** (`აკად/მოსამზად == "აკად"`)
-        - Grant percentages of 50%, 70%, and 100% of the base amount
-        - Base grant amount: **2,250 Georgian Lari**
-        
-        ## Data Processing and Filters
-        
-        ### University Level Analysis
-        - **Minimum student threshold**: Universities with fewer than 50 students are excluded
-        - **Grant calculation**: Average grant percentage across all students in each university
-        - **Total grant money**: Calculated as `(Grant % / 100) × 2,250 × Number of Students`
-        
-        ### Program Level Analysis
-        - **Minimum student threshold**: Programs with fewer than 10 students are excluded
-        - **Program consolidation**: Programs with identical names within the same university are combined, regardless of program codes
-        - **Grant calculation**: Average grant percentage across all students in each program
-        
-        ### Subject Level Analysis
-        - **Subject focus**: Based on Optional Subject 1 (`არჩევითი საგანი 1`)
-        - **Minimum student threshold**: Subjects with fewer than 20 students are excluded
-        - **Grant calculation**: Average grant percentage across all students taking each optional subject
-        
-        ## Key Metrics Explained
-        
-        ### Average Grant Percentage
-        - Simple arithmetic mean of all grant percentages for students in the given category
-        - Missing grant data is treated as 0%
-        
-        ### Grant Distribution
-        - **50% Grant**: Number of students receiving 50% of base amount (1,125 Lari)
-        - **70% Grant**: Number of students receiving 70% of base amount (1,575 Lari)  
-        - **100% Grant**: Number of students receiving 100% of base amount (2,250 Lari)
-        
-        ### Total Grant Money
-        - Sum of all individual student grants within the category
-        - Formula: `Σ(Individual Grant % × 2,250)` for all students
-        
-        ## Data Quality Notes
-        
-        ### Exclusions
-        1. **Non-academic programs**: Only academic programs (`აკად`) are included
-        2. **Small cohorts**: Universities < 50 students, programs < 10 students, and subjects < 20 students are excluded
-        3. **Missing data**: Grant percentages with null values are treated as 0%
-        
-        ### Program Consolidation Logic
-        Programs are grouped by:
-        - University name (`უსდ`)
-        - Program name (`პროგრამა`)
-        
-        **Note**: Program codes (`პროგ. კოდი`) are ignored to combine duplicate programs with different codes within the same university.
-        
-        ## Sorting and Ranking
-        
-        - **Universities**: Sorted by average grant percentage (descending), then by university code
-        - **Programs**: Sorted by average grant percentage (descending), then by program name
-        - **Subjects**: Sorted by average grant percentage (descending), then by subject name
-        - **Visualizations**: All charts maintain this consistent sorting for easy comparison
-        
-        ## Limitations
-        
-        1. **Temporal scope**: Analysis represents a snapshot in time
-        2. **Sample bias**: Small programs and universities are excluded, which may affect representativeness
-        3. **Data completeness**: Results depend on completeness of source data
-        4. **Program classification**: Relies on university-provided program names and classifications
-        5. **Single metric limitation**: Grant percentage alone does not determine program or university quality
-        6. **Potential data flaws**: Source data may contain errors or inconsistencies
-        
-        ## Technical Implementation
-        
-        - **Data processing**: Python pandas for aggregation and filtering
-        - **Visualizations**: Plotly for interactive charts
-        - **Interface**: Streamlit for web dashboard
-        - **Caching**: Data is cached for performance optimization
-        """
+        "rank_by": "Rank by",
+        "rank_mean": "Average grant %",
+        "rank_shrunk": "Adjusted average grant %",
+        "rank_help": "The adjusted average pulls each average toward the average of all students, the more the fewer "
+                     "students it rests on, so small programs no longer rank next to large ones on a few grants. "
+                     "The tables also show a 95% bootstrap confidence interval of every average.",
+        "cross_filter": "Filter",
+        "cross_filter_help": "Narrow every chart and table to the students matching the filters. Clicking a university, "
+                             "program or subject in a chart adds it to the filter; a chart is not filtered by its own selection.",
+        "filter_university": "Universities",
+        "filter_program": "Programs",
+        "filter_subject1": "Optional subject 1",
+        "filter_subject2": "Optional subject 2",
+        "filter_choice": "Choice",
+        "filter_score": "Total score",
+        "filtered_students": "{count:,} of {total:,} students match the filters",
+        "distribution_analysis": "Score Distributions",
+        "distribution_level": "Compare",
+        "distribution_university": "Universities",
+        "distribution_program": "Programs",
+        "distribution_subject": "Subjects",
+        "distribution_score": "Score",
+        "distribution_groups": "Groups to compare (up to 30)",
+        "distribution_title": "Share of Students per Score Range",
+        "distribution_quantiles": "Size, Average and Percentiles"
     },
     "ka": {
-        "title": "📊 2025 ქართული უნივერსიტეტების გრანტების ანალიზი",
+        "title": "📊 {year} ქართული უნივერსიტეტების გრანტების ანალიზი",
         "language": "ენა",
+        "view": "ხედი",
+        "year": "წელი",
         "university_level": "🏛️ უნივერსიტეტის რენკინგი",
         "program_level": "📚 პროგრამის რენკინგი",
         "subject_level": "📖 საგნის რენკინგი",
+        "score_distributions": "📉 ქულების განაწილება",
+        "year_over_year": "📈 წლების შედარება",
         "raw_data": "📋 ნედლი მონაცემები",
         "methodology": "📖 მეთოდოლოგია",
         "university_analysis": "უნივერსიტეტის საშუალო გრანტი",
@@ -246,6 +231,7 @@ TRANSLATIONS = {
         "subject_details": "საგნის დეტალების ცხრილი",
         "search_programs": "მოძებნე პროგრამები:",
         "search_subjects": "მოძებნე საგნები:",
+        "search_rows": "მოძებნე პროგრამები ან უნივერსიტეტები:",
         "raw_data_view": "ნედლი მონაცემების ნახვა",
         "select_columns": "აირჩიე სვეტები საჩვენებლად",
         "choose_columns": "აირჩიე სვეტები საჩვენებლად:",
@@ -253,94 +239,50 @@ TRANSLATIONS = {
         "sort_order": "დალაგების წესი:",
         "descending": "კლებადობით",
         "ascending": "ზრდადობით",
-        "download_csv": "ჩამოტვირთე ფილტრირებული მონაცემები CSV ფორმატში",
+        "page_size": "სტრიქონები გვერდზე:",
+        "page": "გვერდი:",
+        "showing_rows": "ნაჩვენებია სტრიქონები {start:,}–{end:,}, სულ {total:,}",
+        "download_csv": "ჩამოტვირთე ფილტრირებული მონაცემები",
+        "export_format": "ფაილის ფორმატი:",
+        "prepare_download": "ჩამოტვირთვის მომზადება",
+        "summary_downloads": "შემაჯამებელი ცხრილები",
+        "download_summaries": "ჩამოტვირთე უნივერსიტეტის, პროგრამისა და საგნის ცხრილები (ZIP)",
+        "year_over_year_analysis": "წლების შედარება",
+        "compared_with": "{year} შედარებულია {previous}-თან. ცვლილება არის {year} მინუს {previous}, საშუალო გრანტის ცვლილება პროცენტულ პუნქტებშია.",
+        "no_earlier_year": "{year}-მდე წლის მონაცემები არ არის, შესადარებელი არაფერია.",
+        "uni_year_over_year": "უნივერსიტეტები",
+        "program_year_over_year": "პროგრამები",
         "summary_stats": "შემაჯამებელი სტატისტიკა",
         "total_records": "მთლიანი ჩანაწერები",
         "universities": "უნივერსიტეტები",
         "50_grant": "50% გრანტი",
         "70_grant": "70% გრანტი",
         "100_grant": "100% გრანტი",
-        "methodology_content": """
-        **მონაცემთა წყარო**: ჩარიცხულთა სია მოპოვებული სახელმწიფო სასწავლო გრანტის მითითებით – აკადემიური (საბაკალავრო) პროგრამები და ქართულ ენაში მომზადების საგანმანათლებლო პროგრამები
-        
-        **წყაროს ბმული**: [https://edu.aris.ge/news/2025-wels-charicxulta-ranjirebuli-sia-fakultetebisa-da-archeviti-sagnebis-mixedvit.html](https://edu.aris.ge/news/2025-wels-charicxulta-ranjirebuli-sia-fakultetebisa-da-archeviti-sagnebis-mixedvit.html)
-        
-        **⚠️ მნიშვნელოვანი გაფრთხილება**: ეს მონაცემები არ უნდა ჩაითვალოს უნივერსიტეტის ან პროგრამის ხარისხის ერთადერთ განმსაზღვრელ ინდიკატორად. ანალიზი ეყრდნობა მხოლოდ გრანტების განაწილების მონაცემებს და შეიძლება შეიცავდეს ნაკლოვანებებს ან შეზღუდვებს. საგანმანათლებლო დაწესებულებებისა და პროგრამების შეფასებისას გასათვალისწინებელია მრავალი ფაქტორი.
-        
-        ანალიზი კონკრეტულად ფოკუსირდება:
-        - **მხოლოდ აკადემიურ პროგრამებზე, ენის მოსამზადებელი პროგრამების გარეშე** (`აკად/მოსამზად == "აკად"`)
-        - გრანტის 50%, 70% და 100% პროცენტებზე საბაზო თანხისა
-        - საბაზო გრანტის თანხა: **2,250 ლარი**
-        
-        ## მონაცემთა დამუშავება და ფილტრები
-        
-        ### უნივერსიტეტის დონის ანალიზი
-        - **მინიმალური სტუდენტების ზღვარი**: 50-ზე ნაკლები სტუდენტის მქონე უნივერსიტეტები გამოირიცხება
-        - **გრანტის გამოთვლა**: საშუალო გრანტის პროცენტი ყველა სტუდენტისთვის თითოეულ უნივერსიტეტში
-        - **მთლიანი გრანტის თანხა**: გამოითვლება როგორც `(გრანტის % / 100) × 2,250 × სტუდენტების რაოდენობა`
-        
-        ### პროგრამის დონის ანალიზი
-        - **მინიმალური სტუდენტების ზღვარი**: 10-ზე ნაკლები სტუდენტის მქონე პროგრამები გამოირიცხება
-        - **პროგრამების კონსოლიდაცია**: ერთნაირი სახელების მქონე პროგრამები ერთ უნივერსიტეტში გაერთიანდება, პროგრამის კოდების მიუხედავად
-        - **გრანტის გამოთვლა**: საშუალო გრანტის პროცენტი ყველა სტუდენტისთვის თითოეულ პროგრამაში
-        
-        ### საგნის დონის ანალიზი
-        - **საგნის ფოკუსი**: ეფუძნება არჩევით საგანს 1 (`არჩევითი საგანი 1`)
-        - **მინიმალური სტუდენტების ზღვარი**: 20-ზე ნაკლები სტუდენტის მქონე საგნები გამოირიცხება
-        - **გრანტის გამოთვლა**: საშუალო გრანტის პროცენტი ყველა სტუდენტისთვის, რომელიც იღებს თითოეულ არჩევით საგანს
-        
-        ## ძირითადი მეტრიკების განმარტება
-        
-        ### საშუალო გრანტის პროცენტი
-        - მარტივი არითმეტიკული საშუალო ყველა სტუდენტის გრანტის პროცენტისა მოცემულ კატეგორიაში
-        - გამოტოვებული გრანტის მონაცემები ითვლება 0%-ად
-        
-        ### გრანტის განაწილება
-        - **50% გრანტი**: სტუდენტების რაოდენობა, რომლებიც იღებენ საბაზო თანხის 50%-ს (1,125 ლარი)
-        - **70% გრანტი**: სტუდენტების რაოდენობა, რომლებიც იღებენ საბაზო თანხის 70%-ს (1,575 ლარი)
-        - **100% გრანტი**: სტუდენტების რაოდენობა, რომლებიც იღებენ საბაზო თანხის 100%-ს (2,250 ლარი)
-        
-        ### მთლიანი გრანტის თანხა
-        - ყველა ინდივიდუალური სტუდენტის გრანტის ჯამი კატეგორიის ფარგლებში
-        - ფორმულა: `Σ(ინდივიდუალური გრანტის % × 2,250)` ყველა სტუდენტისთვის
-        
-        ## მონაცემთა ხარისხის შენიშვნები
-        
-        ### გამორიცხვები
-        1. **არააკადემიური პროგრამები**: მხოლოდ აკადემიური პროგრამები (`აკად`) ითვლება
-        2. **მცირე ჯგუფები**: უნივერსიტეტები < 50 სტუდენტი, პროგრამები < 10 სტუდენტი და საგნები < 20 სტუდენტი გამოირიცხება
-        3. **გამოტოვებული მონაცემები**: ნულოვანი მნიშვნელობების მქონე გრანტის პროცენტები ითვლება 0%-ად
-        
-        ### პროგრამების კონსოლიდაციის ლოგიკა
-        პროგრამები ჯგუფდება:
-        - უნივერსიტეტის სახელით (`უსდ`)
-        - პროგრამის სახელით (`პროგრამა`)
-        
-        **შენიშვნა**: პროგრამის კოდები (`პროგ. კოდი`) იგნორირდება დუბლიკატი პროგრამების გასაერთიანებლად ერთ უნივერსიტეტში, განსხვავებული ჩასაბარებელი საგნების შემთხვევაში.
-        
-        ## დალაგება და რენკინგი
-        
-        - **უნივერსიტეტები**: დალაგებული საშუალო გრანტის პროცენტით (კლებადობით), შემდეგ უნივერსიტეტის კოდით
-        - **პროგრამები**: დალაგებული საშუალო გრანტის პროცენტით (კლებადობით), შემდეგ პროგრამის სახელით
-        - **საგნები**: დალაგებული საშუალო გრანტის პროცენტით (კლებადობით), შემდეგ საგნის სახელით
-        - **ვიზუალიზაციები**: ყველა დიაგრამა ინარჩუნებს ამ თანმიმდევრულ დალაგებას ადვილი შედარებისთვის
-        
-        ## შეზღუდვები
-        
-        1. **დროითი ფარგლები**: ანალიზი წარმოადგენს დროის მომენტის სურათს
-        2. **ნიმუშის მიკერძოება**: მცირე პროგრამები და უნივერსიტეტები გამოირიცხება, რაც შეიძლება იმოქმედოს რეპრეზენტაციულობაზე
-        3. **მონაცემთა სისრულე**: შედეგები დამოკიდებულია წყარო მონაცემების სისრულეზე
-        4. **პროგრამების კლასიფიკაცია**: ეყრდნობა უნივერსიტეტის მიერ მოწოდებულ პროგრამების სახელებსა და კლასიფიკაციებს
-        5. **ერთი მეტრიკის შეზღუდვა**: მხოლოდ გრანტის პროცენტი არ განსაზღვრავს პროგრამის ან უნივერსიტეტის ხარისხს
-        6. **პოტენციური მონაცემთა ნაკლოვანებები**: საწყისი მონაცემები შეიძლება შეიცავდეს შეცდომებს ან არათანმიმდევრულობას
-        
-        ## ტექნიკური იმპლემენტაცია
-        
-        - **მონაცემთა დამუშავება**: Python pandas აგრეგაციისა და ფილტრაციისთვის
-        - **ვიზუალიზაციები**: Plotly ინტერაქციული დიაგრამებისთვის
-        - **ინტერფეისი**: Streamlit ვებ დაშბორდისთვის
-        - **კეშირება**: მონაცემები კეშირდება შესრულების ოპტიმიზაციისთვის
-        """
+        "rank_by": "რენკინგი",
+        "rank_mean": "საშუალო გრანტი %",
+        "rank_shrunk": "შესწორებული საშუალო გრანტი %",
+        "rank_help": "შესწორებული საშუალო თითოეულ საშუალოს ყველა სტუდენტის საშუალოსკენ სწევს, მით უფრო, რაც "
+                     "ნაკლებ სტუდენტს ეყრდნობა, ასე რომ მცირე პროგრამები რამდენიმე გრანტის გამო აღარ ხვდება "
+                     "დიდების გვერდით. ცხრილებში ასევე ნაჩვენებია თითოეული საშუალოს 95%-იანი ბუტსტრეპ ნდობის ინტერვალი.",
+        "cross_filter": "ფილტრი",
+        "cross_filter_help": "ყველა გრაფიკი და ცხრილი მხოლოდ ფილტრის შესაბამის სტუდენტებს აჩვენებს. გრაფიკზე უნივერსიტეტის, "
+                             "პროგრამის ან საგნის დაჭერა მას ფილტრს უმატებს; გრაფიკი საკუთარი არჩევანით არ იფილტრება.",
+        "filter_university": "უნივერსიტეტები",
+        "filter_program": "პროგრამები",
+        "filter_subject1": "არჩევითი საგანი 1",
+        "filter_subject2": "არჩევითი საგანი 2",
+        "filter_choice": "არჩევანი",
+        "filter_score": "საკონკურსო ქულა",
+        "filtered_students": "ფილტრს {total:,}-დან {count:,} სტუდენტი შეესაბამება",
+        "distribution_analysis": "ქულების განაწილება",
+        "distribution_level": "შედარება",
+        "distribution_university": "უნივერსიტეტები",
+        "distribution_program": "პროგრამები",
+        "distribution_subject": "საგნები",
+        "distribution_score": "ქულა",
+        "distribution_groups": "შესადარებელი ჯგუფები (30-მდე)",
+        "distribution_title": "სტუდენტების წილი ქულების მიხედვით",
+        "distribution_quantiles": "რაოდენობა, საშუალო და პროცენტილები"
     }
 }
 
@@ -354,279 +296,283 @@ lang = st.selectbox(
 
 t = TRANSLATIONS[lang]
 
-# Load translation data
-@st.cache_data
-def load_translations():
-    try:
-        with open("universities.json", "r", encoding="utf-8") as f:
-            universities_trans = json.load(f)
-        with open("programs.json", "r", encoding="utf-8") as f:
-            programs_trans = json.load(f)
-        return universities_trans, programs_trans
-    except FileNotFoundError:
-        return {}, {}
-
-# Load data
-@st.cache_data
-def load_data():
-    data = pd.read_excel("grants.xlsx")
-    filtered_data = data[data["აკად/მოსამზად"] == "აკად"]
-    filtered_data["გრანტი %"].fillna(0, inplace=True)
-    return filtered_data
-
-def apply_translations(data, lang, universities_trans, programs_trans):
-    """Apply translations to the data based on selected language"""
-    if lang == "en":
-        data_translated = data.copy()
-        
-        # Create a reverse mapping for universities (English -> Georgian)
-        uni_reverse_map = {}
-        for georgian_name, trans_data in universities_trans.items():
-            english_name = trans_data.get("english", georgian_name)
-            uni_reverse_map[english_name] = georgian_name
-        
-        # Translate program names first (using original Georgian university names)
-        if programs_trans:
-            def translate_program(row):
-                key = f"{row['უსდ']}_{row['პროგ. კოდი']}"
-                return programs_trans.get(key, {}).get("english", row["პროგრამა"])
-            
-            data_translated["პროგრამა"] = data_translated.apply(translate_program, axis=1)
-        
-        # Translate subject names
-        subject_translations = {
-            "ფიზიკა": "Physics",
-            "ქიმია": "Chemistry", 
-            "ხელოვნება": "Art",
-            "მათემატიკა": "Mathematics",
-            "გეოგრაფია": "Geography",
-            "ლიტერატურა": "Literature",
-            "სამოქალაქო განათლება": "Civic Education",
-            "ისტორია": "History",
-            "ბიოლოგია": "Biology"
-        }
-        
-        for col in ["არჩევითი საგანი 1", "არჩევითი საგანი 2"]:
-            if col in data_translated.columns:
-                data_translated[col] = data_translated[col].map(
-                    lambda x: subject_translations.get(x, x) if pd.notna(x) else x
-                )
-        
-        # Translate university names last
-        if universities_trans:
-            data_translated["უსდ"] = data_translated["უსდ"].map(
-                lambda x: universities_trans.get(x, {}).get("english", x)
-            )
-        
-        return data_translated
+# One workbook per NAEC release, the newest year is shown first
+sources = year_sources()
+if len(sources) > 1:
+    year = st.selectbox(t["year"], options=sorted(sources, reverse=True))
+else:
+    year = next(iter(sources))
+source = sources[year]
+
+# st.cache_data hands every caller its own deep copy. In shared mode one frozen copy
+# per process serves every session, and in-place writes to it raise
+cache_dataset = st.cache_resource if SHARED else st.cache_data
+
+# Translation table, one per process: it reads its compiled tables on the first English rerun
+@st.cache_resource
+def load_translations(directory="."):
+    return read_translations(directory)
+
+# Load data - only needed when no prebuilt artifacts exist or raw rows are shown.
+# Only the columns the rankings use are read; the raw data tab loads the others when
+# it first shows them. Only one year's rows are kept, switching years must not add up their memory
+@cache_dataset(max_entries=1)
+def load_data(source, version, compact=COMPACT):
+    with recorder.stage("load") as stage:
+        rows = load_analysis_rows(source, compact)
+        stage.rows = len(rows)
+    return freeze_frame(rows) if SHARED else rows
+
+def load_columns(source, columns):
+    """Further columns of the student rows, in the same row order as load_data"""
+    with recorder.stage("load.columns") as stage:
+        rows = load_rows(source, COMPACT, columns)
+        stage.rows = len(rows)
+    return rows
+
+@st.cache_resource
+def table_cache():
+    """Process-wide cache of aggregate tables, shared by all sessions"""
+    return LRUCache(max_entries=24, name="tables")
+
+@st.cache_resource
+def row_cache():
+    """Process-wide cache of translated student rows, one year's languages at a time"""
+    return LRUCache(max_entries=2, name="rows")
+
+@st.cache_resource
+def export_cache():
+    """Process-wide cache of encoded downloads, built only when someone asks for them"""
+    return LRUCache(max_entries=8, name="exports")
+
+@st.cache_resource
+def figure_cache():
+    """Process-wide cache of built Plotly figures, so reruns and sessions only serialize them"""
+    return LRUCache(max_entries=12, name="figures")
+
+@st.cache_resource
+def filter_cache():
+    """Process-wide cache of ranking tables of filtered students, per view and the filters that apply to it"""
+    return LRUCache(max_entries=32, name="filtered")
+
+@st.cache_resource
+def distribution_cache():
+    """Process-wide cache of every group's score distributions, per level and the filters that apply to it"""
+    return LRUCache(max_entries=12, name="distributions")
+
+dataset_version = source_version(source)
+versions = {other: source_version(path) for other, path in sources.items()}
+translations = load_translations(translations_dir(source))
+
+st.title(t["title"].format(year=year))
+
+# Rankings are built in mean grant order; the shrunk mean only re-sorts the small tables
+ranking = st.radio(t["rank_by"], options=list(RANKINGS), format_func=lambda key: t[f"rank_{key}"],
+                   horizontal=True, help=t["rank_help"])
+
+# Tables are keyed by dataset version and language, so widget reruns only slice them.
+# Versions of every live year stay cached, replaced workbooks are dropped
+tables = table_cache()
+for cache in (tables, row_cache(), export_cache(), figure_cache(), filter_cache(), distribution_cache()):
+    cache.evict_where(lambda key: key[0] not in versions.values())
+
+def shared(data):
+    """A table, or the tables of a dict, frozen in shared mode since every session sees them"""
+    if SHARED:
+        for table in data.values() if isinstance(data, dict) else [data]:
+            if isinstance(table, pd.DataFrame):
+                freeze_frame(table)
+            elif isinstance(table, GrantCube):
+                freeze_frame(table.cells)
     return data
 
-universities_trans, programs_trans = load_translations()
-filtered_data = load_data()
-
-st.title(t["title"])
-
-# Apply translations to data and use translated data for display
-display_data = apply_translations(filtered_data, lang, universities_trans, programs_trans)
-
-# Column name translations
-column_translations = {
-    "უსდ კოდი": "University Code",
-    "უსდ": "University",
-    "პროგ. კოდი": "Program Code", 
-    "პროგრამა": "Program",
-    "საშ. გრანტი %": "Avg Grant %",
-    "პროგრამების რაოდ.": "Number of Programs",
-    "სტუდ. 50%": "Students 50%",
-    "სტუდ. 70%": "Students 70%",
-    "სტუდ. 100%": "Students 100%",
-    "სულ სტუდ.": "Total Students",
-    "სტუდ. რაოდ.": "Number of Students",
-    "არჩევითი საგანი": "Optional Subject",
-    "გრანტი %": "Grant %",
-    "საგამოცდო": "Exam Subjects",
-    "ქართული ენა ნედლი ქულა": "Georgian Language Raw Score",
-    "ქართული ენა სკალ.": "Georgian Language Scale",
-    "უცხო ენა": "Foreign Language",
-    "უცხო ენა ნედლი ქულა": "Foreign Language Raw Score",
-    "უცხო ენა სკალ.": "Foreign Language Scale",
-    "არჩევითი საგანი 1": "Optional Subject 1",
-    "არჩევითი ნედლი ქულა": "Optional Raw Score",
-    "არჩევითი სკალ.": "Optional Scale",
-    "არჩევითი საგანი 2": "Optional Subject 2",
-    "არჩევითი 2 ნედლი ქულა": "Optional 2 Raw Score",
-    "არჩევითი 2 სკალ.": "Optional 2 Scale",
-    "საკონკ. ქულა": "Total Score",
-    "არჩევანი": "Choice",
-    "აკად/მოსამზად": "Academic/Preparatory"
-}
+def load_stored(source, version):
+    """Tables precomputed by `python -m unidata build`, None when they are missing or stale"""
+    return tables.get_or_build((version, "artifacts"), recorder.timed("artifacts", lambda: load_artifacts(version, THRESHOLDS)))
+
+def load_base(source, version):
+    """Totals grouped on the Georgian names and codes once per dataset version; each
+    language only relabels and merges those few hundred rows"""
+    stored = load_stored(source, version)
+    return tables.get_or_build(
+        (version, "base"),
+        recorder.timed("aggregate", lambda: shared(stored["base"] if stored else base_aggregates(load_data(source, version))))
+    )
+
+stored = load_stored(source, dataset_version)
+base = load_base(source, dataset_version)
 
-def translate_columns(df, lang):
-    """Translate column names based on language"""
-    if lang == "en":
-        df_translated = df.copy()
-        df_translated.columns = [column_translations.get(col, col) for col in df_translated.columns]
-        return df_translated
-    return df
+def load_aggregates(lang):
+    """Ranking tables for a language, from the artifacts or built from the base totals"""
+    return tables.get_or_build(
+        (dataset_version, lang, "aggregates", tuple(THRESHOLDS.items())),
+        recorder.timed(
+            "localize",
+            lambda: shared(stored[lang] if stored else localize(base, lang, translations, THRESHOLDS))
+        )
+    )
 
-# Main content tabs
-tab1, tab2, tab3, tab4, tab5 = st.tabs([t["university_level"], t["program_level"], t["subject_level"], t["raw_data"], t["methodology"]])
+aggregates = load_aggregates(lang)
 
-with tab1:
-    st.header(t["university_analysis"])
+# Search indexes over Georgian, English and transliterated names, keyed by the shown labels
+search_indexes = tables.get_or_build(
+    (dataset_version, lang, "search"),
+    recorder.timed("search", lambda: build_search_indexes(
+        base,
+        lambda table: apply_translations(table, lang, translations)
+    ))
+)
+overview = aggregates["overview"]
+
+def load_browser():
+    """Translated student rows of the year and language, shared by the raw data view and the filters.
+    Only the raw rows need translating row by row, once per dataset version and language"""
+    return row_cache().get_or_build(
+        (dataset_version, lang, "browser"),
+        recorder.timed(
+            "translate_rows",
+            lambda: RowBrowser(
+                shared(apply_translations(load_data(source, dataset_version), lang, translations)),
+                columns=source_columns(source),
+                load_columns=lambda columns: shared(
+                    apply_translations(load_columns(source, columns), lang, translations)
+                )
+            ),
+            len
+        )
+    )
+
+def load_filter_index():
+    """Bitmap index of the filter dimensions over the browser's rows, once per dataset version and language"""
+    def build():
+        browser = load_browser()
+        browser.require(FILTER_COLUMNS + list(SCORE_BINS))
+        return BitmapIndex(browser.data)
+    return tables.get_or_build((dataset_version, lang, "filter_index"), recorder.timed("filter_index", build))
+
+def filter_key(column):
+    """Widget key of a column's filter; per year and language, since it holds the shown labels"""
+    return f"filter_{column}_{year}_{lang}"
+
+FILTER_LABELS = {
+    "უსდ": "filter_university", "პროგრამა": "filter_program", "არჩევითი საგანი 1": "filter_subject1",
+    "არჩევითი საგანი 2": "filter_subject2", "არჩევანი": "filter_choice", "საკონკ. ქულა": "filter_score",
+}
+
+def filter_panel(index):
+    """Filter widgets over the indexed values; returns the active filters by column"""
+    filters = {}
+    columns = st.columns(3)
+    for position, column in enumerate(FILTER_COLUMNS):
+        with columns[position % len(columns)]:
+            filters[column] = st.multiselect(t[FILTER_LABELS[column]], options=index.values[column], key=filter_key(column))
+    for column, width in index.widths.items():
+        full = (index.values[column][0], index.values[column][-1] + width)
+        selected = st.slider(t[FILTER_LABELS[column]], min_value=full[0], max_value=full[1], value=full,
+                             step=float(width), key=filter_key(column))
+        if tuple(selected) != full:
+            filters[column] = tuple(selected)
+    selected_rows = index.select(filters)
+    if selected_rows is not None:
+        st.caption(t["filtered_students"].format(count=index.count(selected_rows), total=index.size))
+    return {column: selection for column, selection in filters.items() if selection}
+
+# Cross-filtering is off until asked for, so visitors who never filter never load the student rows
+filter_index = None
+filters = {}
+if st.toggle(t["cross_filter"], help=t["cross_filter_help"], key="cross_filter"):
+    filter_index = load_filter_index()
+    filters = filter_panel(filter_index)
+
+def view_table(view):
+    """A view's ranking table, of the students passing the filters that apply to it. Each view
+    ignores the filter on its own dimension, so a click only rebuilds the other views' tables"""
+    applied = view_filters(filters, view)
+    if not applied:
+        return aggregates[view]
+    return filter_cache().get_or_build(
+        (dataset_version, lang, view, applied, tuple(THRESHOLDS.items())),
+        recorder.timed(
+            f"filtered.{view}",
+            lambda: shared(filtered_table(filter_index, load_browser().data, view, applied, THRESHOLDS[view])),
+            len
+        )
+    )
 
-    # University aggregated data - filter universities with less than 50 students
-    uni_data = display_data.groupby(["უსდ კოდი", "უსდ"]).agg({
-        "გრანტი %": "mean",
-        "პროგრამა": "count"
-    }).round(2).reset_index()
+def ranked(view):
+    """A view's ranking table in the order chosen with the ranking selector"""
+    return rank(view_table(view), ranking)
 
-    # Calculate grant counts per university
-    grant_counts = display_data.groupby(["უსდ კოდი", "უსდ"]).apply(lambda x: pd.Series({
-        "სტუდ. 50% გრანტი": (x["გრანტი %"] == 50).sum(),
-        "სტუდ. 70% გრანტი": (x["გრანტი %"] == 70).sum(),
-        "სტუდ. 100% გრანტი": (x["გრანტი %"] == 100).sum(),
-        "სულ სტუდენტები": len(x)
-    })).reset_index()
+def view_figures(view):
+    """Serialized figures of a view for the current language, ranking and filters, built once per dataset version"""
+    return figure_cache().get_or_build(
+        (dataset_version, lang, view, ranking, view_filters(filters, view), tuple(THRESHOLDS.items())),
+        recorder.timed(f"figures.{view}", lambda: build_figures(view, ranked(view), t, lang), len(aggregates[view]))
+    )
+
+def show_table(data):
+    """st.dataframe at full width, timed with the rows it serializes"""
+    with recorder.stage("render.dataframe", rows=len(data)):
+        st.dataframe(data, use_container_width=True)
+
+def add_clicked(chart_key, column, field):
+    """Chart selection callback: the clicked points' values join the column's filter"""
+    clicked = []
+    for point in st.session_state[chart_key]["selection"]["points"]:
+        value = point.get(field)
+        if isinstance(value, list):
+            value = value[0] if value else None
+        if value is not None:
+            clicked.append(value)
+    key = filter_key(column)
+    st.session_state[key] = list(dict.fromkeys([*st.session_state.get(key, []), *clicked]))
+
+def show_figure(figure, name=None):
+    """st.plotly_chart at full width, timed as the figure is serialized. While filtering,
+    clicking a point of a named figure adds its university, program or subject to the filters"""
+    with recorder.stage("render.plotly"):
+        if filter_index is None or name not in FIGURE_FILTERS:
+            st.plotly_chart(figure, use_container_width=True)
+        else:
+            chart_key = f"chart_{name}"
+            st.plotly_chart(figure, use_container_width=True, key=chart_key, selection_mode="points",
+                            on_select=functools.partial(add_clicked, chart_key, *FIGURE_FILTERS[name]))
+
+# Each analysis view is a self-contained function, so it can run inside a tab or alone
+def university_view():
+    st.header(t["university_analysis"])
 
-    # Merge the data and filter universities with less than 50 students
-    uni_data = uni_data.merge(grant_counts, on=["უსდ კოდი", "უსდ"])
-    uni_data = uni_data[uni_data["სულ სტუდენტები"] >= 50]
-    uni_data = uni_data.sort_values("გრანტი %", ascending=False)
+    # University aggregated data - universities with less than 50 students are filtered out
+    uni_data = ranked("university")
 
-    uni_data.columns = ["უსდ კოდი", "უსდ", "საშ. გრანტი %", "პროგრამების რაოდ.", "სტუდ. 50%",
-                       "სტუდ. 70%", "სტუდ. 100%", "სულ სტუდ."]
+    figures = view_figures("university")
 
     # Grant percentage visualization - full width
-    fig_grant = px.bar(uni_data,
-                      x="უსდ", y="საშ. გრანტი %",
-                      title=t["avg_grant_by_uni"],
-                      color="საშ. გრანტი %",
-                      color_continuous_scale="Viridis",
-                      hover_data=["სულ სტუდ."])
-    fig_grant.update_layout(
-        xaxis_title="",
-        xaxis_showticklabels=False,
-        height=400,
-        margin=dict(l=20, r=20, t=40, b=20),
-        font=dict(size=10),
-        title_font_size=14,
-        coloraxis_showscale=False  # Hide color scale on mobile
-    )
-    # Update hover template to show university names properly
-    fig_grant.update_traces(
-        hovertemplate='<b>%{x}</b><br>' + 
-                      ('Avg Grant %' if lang == "en" else 'საშ. გრანტი %') + ': %{y:.1f}%<br>' +
-                      ('Total Students' if lang == "en" else 'სულ სტუდ.') + ': %{customdata[0]}<extra></extra>'
-    )
-    st.plotly_chart(fig_grant, use_container_width=True)
+    show_figure(figures["grant"], "grant")
 
     # Grant distribution stacked bar chart
     st.subheader(t["grant_dist_by_uni"])
-    fig_grants = go.Figure()
-    fig_grants.add_trace(go.Bar(
-        name=t["50_grant"],
-        x=uni_data['უსდ'],
-        y=uni_data['სტუდ. 50%'],
-        marker_color='lightblue',
-        hovertemplate='<b>%{x}</b><br>' + t["50_grant"] + ': %{y}<extra></extra>'
-    ))
-    fig_grants.add_trace(go.Bar(
-        name=t["70_grant"],
-        x=uni_data['უსდ'],
-        y=uni_data['სტუდ. 70%'],
-        marker_color='orange',
-        hovertemplate='<b>%{x}</b><br>' + t["70_grant"] + ': %{y}<extra></extra>'
-    ))
-    fig_grants.add_trace(go.Bar(
-        name=t["100_grant"],
-        x=uni_data['უსდ'],
-        y=uni_data['სტუდ. 100%'],
-        marker_color='green',
-        hovertemplate='<b>%{x}</b><br>' + t["100_grant"] + ': %{y}<extra></extra>'
-    ))
-    fig_grants.update_layout(
-        barmode='stack',
-        title=t["grant_dist_sorted"],
-        xaxis_title="",
-        yaxis_title='Students' if lang == "en" else 'სტუდ.',
-        xaxis_showticklabels=False,
-        height=450,  # Increased height to accommodate legend underneath
-        margin=dict(l=20, r=20, t=40, b=80),  # Increased bottom margin for legend
-        font=dict(size=10),
-        title_font_size=14,
-        showlegend=True,  # Show legend - will be hidden on mobile via CSS
-        legend=dict(
-            orientation="h",  # Horizontal legend underneath
-            yanchor="top",
-            y=-0.15,  # Position below the chart
-            xanchor="center",
-            x=0.5,
-            font=dict(size=10)
-        )
-    )
-    st.plotly_chart(fig_grants, use_container_width=True)
+    show_figure(figures["grant_levels"], "grant_levels")
 
     # University data table
     st.subheader(t["uni_summary_table"])
     # Translate column names for display
-    uni_data_display = translate_columns(uni_data, lang)
-    st.dataframe(uni_data_display, use_container_width=True)
+    uni_data_display = translate_columns(uni_data.drop(columns=[MONEY_COLUMN]), lang)
+    show_table(uni_data_display)
 
     # Total grant money pie chart
     st.subheader(t["total_grant_money"])
 
-    # Calculate total grant money per university
-    # Grant money = (Grant % / 100) * 2250 * Number of students
-    uni_data['სულ გრანტის თანხა (ლარი)'] = (uni_data['საშ. გრანტი %'] / 100) * 2250 * uni_data['სულ სტუდ.']
-
-    # Create pie chart
-    fig_pie = px.pie(uni_data,
-                     values='სულ გრანტის თანხა (ლარი)',
-                     names='უსდ',
-                     title=t["grant_money_pie"],
-                     hover_data=['სულ სტუდ.', 'საშ. გრანტი %'])
-
-    fig_pie.update_traces(
-        textposition='inside',
-        textinfo='percent',
-        textfont_size=9
-    )
-    fig_pie.update_layout(
-        height=450,  # Increased height for legend
-        margin=dict(l=10, r=10, t=40, b=80),  # Increased bottom margin for legend
-        font=dict(size=9),
-        title_font_size=14,
-        showlegend=False  # Remove legend from pie chart
-    )
+    # Pie chart of the total grant money per university
+    show_figure(figures["money"], "money")
 
-    st.plotly_chart(fig_pie, use_container_width=True)
-
-with tab2:
+def program_view():
     st.header(t["program_analysis"])
 
-    # Program aggregated data - filter programs with less than 10 students
-    # Group by university and program name only (ignoring program codes)
-    prog_counts = display_data.groupby(["უსდ", "პროგრამა"]).size().reset_index(name='student_count')
-    valid_programs = prog_counts[prog_counts['student_count'] >= 10][['უსდ', 'პროგრამა']]
-
-    # Filter display_data to only include valid programs
-    prog_filtered_data = display_data.merge(valid_programs, on=['უსდ', 'პროგრამა'])
-
-    # Calculate program data with grant distribution
-    def calculate_program_stats(group):
-        return pd.Series({
-            'საშ. გრანტი %': group['გრანტი %'].mean(),
-            'სტუდ. 50%': (group['გრანტი %'] == 50).sum(),
-            'სტუდ. 70%': (group['გრანტი %'] == 70).sum(),
-            'სტუდ. 100%': (group['გრანტი %'] == 100).sum(),
-            'სტუდ. რაოდ.': len(group)
-        })
-
-    prog_data = prog_filtered_data.groupby(["უსდ", "პროგრამა"]).apply(calculate_program_stats).reset_index()
-
-    # Sort by average grant percentage, then by program name
-    prog_data = prog_data.sort_values(["საშ. გრანტი %", "პროგრამა"], ascending=[False, True])
+    # Program aggregated data - programs with less than 10 students are filtered out
+    # Grouped by university and program name only (ignoring program codes), sorted by
+    # average grant percentage, then by program name
+    prog_data = ranked("program")
 
     # Display metrics
     col1, col2, col3 = st.columns(3)
@@ -640,94 +586,27 @@ with tab2:
     # Single comprehensive graph showing top programs with grant distribution
     st.subheader(t["top_30_programs"])
 
-    top_30_programs = prog_data.head(30)
-
-    fig_prog_dist = go.Figure()
-    fig_prog_dist.add_trace(go.Bar(
-        name=t["50_grant"],
-        x=list(range(len(top_30_programs))),
-        y=top_30_programs['სტუდ. 50%'],
-        hovertemplate='<b>%{customdata}</b><br>' + t["50_grant"] + ': %{y}<extra></extra>',
-        customdata=top_30_programs['პროგრამა'],
-        marker_color='lightblue'
-    ))
-    fig_prog_dist.add_trace(go.Bar(
-        name=t["70_grant"],
-        x=list(range(len(top_30_programs))),
-        y=top_30_programs['სტუდ. 70%'],
-        hovertemplate='<b>%{customdata}</b><br>' + t["70_grant"] + ': %{y}<extra></extra>',
-        customdata=top_30_programs['პროგრამა'],
-        marker_color='orange'
-    ))
-    fig_prog_dist.add_trace(go.Bar(
-        name=t["100_grant"],
-        x=list(range(len(top_30_programs))),
-        y=top_30_programs['სტუდ. 100%'],
-        hovertemplate='<b>%{customdata}</b><br>' + t["100_grant"] + ': %{y}<extra></extra>',
-        customdata=top_30_programs['პროგრამა'],
-        marker_color='green'
-    ))
-
-    fig_prog_dist.update_layout(
-        barmode='stack',
-        title=t["top_30_title"],
-        xaxis_title="",
-        yaxis_title='Students' if lang == "en" else 'სტუდ.',
-        xaxis_showticklabels=False,
-        height=550,  # Increased height for legend
-        margin=dict(l=20, r=20, t=40, b=80),  # Increased bottom margin for legend
-        font=dict(size=10),
-        title_font_size=14,
-        showlegend=True,  # Show legend - will be hidden on mobile via CSS
-        legend=dict(
-            orientation="h",  # Horizontal legend underneath
-            yanchor="top",
-            y=-0.12,  # Position below the chart
-            xanchor="center",
-            x=0.5,
-            font=dict(size=10)
-        )
-    )
-
-    st.plotly_chart(fig_prog_dist, use_container_width=True)
+    show_figure(view_figures("program")["top_programs"], "top_programs")
 
     # Program data table with search
     st.subheader(t["program_details"])
     search_term = st.text_input(t["search_programs"], "")
     if search_term:
-        prog_display = prog_data[prog_data["პროგრამა"].str.contains(search_term, case=False, na=False)]
+        matches = search_indexes["program"].search(search_term)
+        prog_display = select_ranked(prog_data, ["უსდ", "პროგრამა"], matches)
     else:
         prog_display = prog_data
 
     # Translate column names for display
     prog_display_translated = translate_columns(prog_display, lang)
-    st.dataframe(prog_display_translated, use_container_width=True)
+    show_table(prog_display_translated)
 
-with tab3:
+def subject_view():
     st.header(t["subject_analysis"])
 
-    # Subject aggregated data - filter subjects with less than 20 students
-    subject_counts = display_data[display_data["არჩევითი საგანი 1"].notna()].groupby("არჩევითი საგანი 1").size().reset_index(name='student_count')
-    valid_subjects = subject_counts[subject_counts['student_count'] >= 20]["არჩევითი საგანი 1"].tolist()
-
-    # Filter display_data to only include valid subjects
-    subject_filtered_data = display_data[display_data["არჩევითი საგანი 1"].isin(valid_subjects)]
-
-    # Calculate subject data
-    def calculate_subject_stats(group):
-        return pd.Series({
-            'საშ. გრანტი %': group['გრანტი %'].mean(),
-            'სტუდ. 50%': (group['გრანტი %'] == 50).sum(),
-            'სტუდ. 70%': (group['გრანტი %'] == 70).sum(),
-            'სტუდ. 100%': (group['გრანტი %'] == 100).sum(),
-            'სტუდ. რაოდ.': len(group)
-        })
-
-    subject_data = subject_filtered_data.groupby("არჩევითი საგანი 1").apply(calculate_subject_stats).reset_index()
-    subject_data.columns = ["არჩევითი საგანი", "საშ. გრანტი %", "სტუდ. 50%", "სტუდ. 70%", "სტუდ. 100%", "სტუდ. რაოდ."]
-
-    # Sort by average grant percentage
-    subject_data = subject_data.sort_values("საშ. გრანტი %", ascending=False)
+    # Subject aggregated data - subjects with less than 20 students are filtered out,
+    # sorted by average grant percentage
+    subject_data = ranked("subject")
 
     # Display metrics
     col1, col2, col3 = st.columns(3)
@@ -739,41 +618,79 @@ with tab3:
         st.metric(t["total_students"], subject_data["სტუდ. რაოდ."].sum())
 
     # Subject grant percentage chart
-    fig_subject = px.bar(subject_data,
-                        x="არჩევითი საგანი", y="საშ. გრანტი %",
-                        title=t["avg_grant_by_subject"],
-                        color="საშ. გრანტი %",
-                        color_continuous_scale="Viridis",
-                        hover_data=["სტუდ. რაოდ."])
-    fig_subject.update_layout(
-        xaxis_title="",
-        xaxis_tickangle=45,
-        height=450,
-        margin=dict(l=20, r=20, t=40, b=80),
-        font=dict(size=10),
-        title_font_size=14,
-        coloraxis_showscale=False,  # Hide color scale
-        xaxis=dict(
-            tickfont=dict(size=8)
-        )
-    )
-    st.plotly_chart(fig_subject, use_container_width=True)
+    show_figure(view_figures("subject")["subject"], "subject")
 
     # Subject data table with search
     st.subheader(t["subject_details"])
     search_term_subject = st.text_input(t["search_subjects"], "")
     if search_term_subject:
-        subject_display = subject_data[subject_data["არჩევითი საგანი"].str.contains(search_term_subject, case=False, na=False)]
+        matches = search_indexes["subject"].search(search_term_subject)
+        subject_display = select_ranked(subject_data, ["არჩევითი საგანი"], matches)
     else:
         subject_display = subject_data
 
     # Translate column names for display
     subject_display_translated = translate_columns(subject_display, lang)
-    st.dataframe(subject_display_translated, use_container_width=True)
+    show_table(subject_display_translated)
+
+# Key columns of each level's ranking table, in the order of the distribution group keys
+RANKED_KEYS = {"university": ["უსდ"], "program": ["უსდ", "პროგრამა"], "subject": ["არჩევითი საგანი"]}
+
+def load_distributions(level):
+    """Score distributions of every group of a level, for the students passing the filters that apply to it.
+    All groups are binned in one pass, so comparing any of them afterwards is a lookup"""
+    applied = view_filters(filters, level)
+
+    def build():
+        browser = load_browser()
+        browser.require(GROUP_KEYS[level] + SCORE_COLUMNS)
+        data = browser.data[GROUP_KEYS[level] + SCORE_COLUMNS]
+        if applied:
+            bitmap = filter_index.select(dict(applied), exclude=VIEW_DIMENSIONS[level])
+            data = data.take(filter_index.positions(bitmap))
+        return score_distributions(data, GROUP_KEYS[level])
+    return distribution_cache().get_or_build(
+        (dataset_version, lang, level, applied),
+        recorder.timed(f"distributions.{level}", build)
+    )
+
+def distribution_view():
+    st.header(t["distribution_analysis"])
 
-with tab4:
+    col1, col2 = st.columns(2)
+    with col1:
+        level = st.radio(t["distribution_level"], options=list(GROUP_KEYS),
+                         format_func=lambda key: t[f"distribution_{key}"], horizontal=True, key="distribution_level")
+    with col2:
+        column = st.selectbox(t["distribution_score"], options=SCORE_COLUMNS,
+                              format_func=lambda col: translate_column(col) if lang == "en" else col,
+                              key="distribution_score")
+    distribution = load_distributions(level)[column]
+
+    # Ranked groups first, in the chosen ranking order, then every other group with a score
+    ranked_groups = [key if len(key) > 1 else key[0]
+                     for key in ranked(level)[RANKED_KEYS[level]].itertuples(index=False, name=None)]
+    ranked_groups = [group for group in ranked_groups if group in distribution]
+    listed = set(ranked_groups)
+    options = ranked_groups + [group for group in distribution.groups if group not in listed]
+    groups = st.multiselect(t["distribution_groups"], options=options, default=ranked_groups[:5],
+                            format_func=distribution.label, max_selections=30,
+                            key=f"distribution_groups_{level}_{year}_{lang}")
+    if not groups:
+        return
+
+    score_label = translate_column(column) if lang == "en" else column
+    show_figure(score_distribution_lines(distribution.histogram(groups), t, lang, score_label))
+
+    st.subheader(t["distribution_quantiles"])
+    show_table(translate_columns(distribution.summary(groups).round(1), lang))
+
+def raw_data_view():
     st.header(t["raw_data_view"])
 
+    # The browser keeps each column's sort order, so reruns only slice one page of rows
+    browser = load_browser()
+
     # Column selection for raw data
     st.subheader(t["select_columns"])
 
@@ -788,7 +705,7 @@ with tab4:
     ]
 
     # Filter available columns
-    available_columns = [col for col in relevant_columns if col in display_data.columns]
+    available_columns = [col for col in relevant_columns if col in browser.columns]
 
     selected_columns = st.multiselect(
         t["choose_columns"],
@@ -801,41 +718,142 @@ with tab4:
         sort_by = st.selectbox(t["sort_by"], options=selected_columns,
                               index=selected_columns.index("გრანტი %") if "გრანტი %" in selected_columns else 0)
         sort_order = st.radio(t["sort_order"], [t["descending"], t["ascending"]])
+        ascending = sort_order == t["ascending"]
+
+        # Restrict rows to programs or universities matching the search
+        search_term_rows = st.text_input(t["search_rows"], "")
+        row_mask = None
+        if search_term_rows:
+            row_mask = (
+                browser.match(["უსდ", "პროგრამა"], search_indexes["program"].search(search_term_rows))
+                | browser.match(["უსდ"], search_indexes["university"].search(search_term_rows))
+            )
+        # Every filter applies to the rows, intersected as bitmaps
+        filtered_rows = filter_index.select(filters) if filter_index is not None else None
+        if filtered_rows is not None:
+            filter_mask = filter_index.mask(filtered_rows)
+            row_mask = filter_mask if row_mask is None else row_mask & filter_mask
+        row_count = len(browser) if row_mask is None else int(row_mask.sum())
+
+        # Paging options
+        col1, col2 = st.columns(2)
+        with col1:
+            page_size = st.selectbox(t["page_size"], options=PAGE_SIZES)
+        page_count = max(1, -(-row_count // page_size))
+        with col2:
+            page = st.number_input(t["page"], min_value=1, max_value=page_count, value=1, step=1)
+        offset = (page - 1) * page_size
+
+        # Display one page of the sorted data
+        page_data = browser.page(selected_columns, sort_by, ascending, offset, page_size, row_mask)
+        show_table(as_written(page_data))
+        st.caption(t["showing_rows"].format(start=min(offset + 1, row_count), end=offset + len(page_data), total=row_count))
+
+        # Download option - the file is only encoded once asked for, then cached per
+        # column set, sort and format
+        export_format = st.selectbox(t["export_format"], options=list(EXPORT_FORMATS))
+        export_key = (dataset_version, lang, tuple(selected_columns), sort_by, ascending, search_term_rows,
+                      view_filters(filters, None), export_format)
+        if st.button(t["prepare_download"], key="prepare_rows"):
+            st.session_state["rows_export"] = export_key
+        if st.session_state.get("rows_export") == export_key:
+            payload = export_cache().get_or_build(
+                export_key,
+                recorder.timed(
+                    "export.rows",
+                    lambda: export_bytes(browser.rows(selected_columns, sort_by, ascending, row_mask), export_format),
+                    row_count
+                )
+            )
+            st.download_button(
+                label=t["download_csv"],
+                data=payload,
+                file_name=f"grant_data_filtered.{EXPORT_FORMATS[export_format]['extension']}",
+                mime=EXPORT_FORMATS[export_format]["mime"],
+                on_click="ignore"
+            )
 
-        # Display filtered and sorted data
-        sorted_data = display_data[selected_columns].sort_values(
-            sort_by, ascending=(sort_order == t["ascending"])
+    # Summary tables of every view in both languages, built once per dataset version
+    st.subheader(t["summary_downloads"])
+    bundle_key = (dataset_version, "summaries", tuple(THRESHOLDS.items()))
+    if st.button(t["prepare_download"], key="prepare_summaries"):
+        st.session_state["summary_export"] = bundle_key
+    if st.session_state.get("summary_export") == bundle_key:
+        payload = export_cache().get_or_build(
+            bundle_key,
+            recorder.timed("export.summaries", lambda: summary_bundle({
+                f"{view}_{code}": translate_columns(load_aggregates(code)[view], code)
+                for code in TRANSLATIONS for view in ("university", "program", "subject")
+            }))
         )
-
-        st.dataframe(sorted_data, use_container_width=True)
-
-        # Download option
-        csv = sorted_data.to_csv(index=False)
         st.download_button(
-            label=t["download_csv"],
-            data=csv,
-            file_name="grant_data_filtered.csv",
-            mime="text/csv"
+            label=t["download_summaries"],
+            data=payload,
+            file_name="grant_summary_tables.zip",
+            mime="application/zip",
+            on_click="ignore"
         )
 
     # Summary statistics
     st.subheader(t["summary_stats"])
-    if len(display_data) > 0:
+    if overview["records"] > 0:
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.metric(t["total_records"], len(display_data))
+            st.metric(t["total_records"], overview["records"])
         with col2:
-            st.metric(t["avg_grant"], f"{display_data['გრანტი %'].mean():.1f}%")
+            st.metric(t["avg_grant"], f"{overview['avg_grant']:.1f}%")
         with col3:
-            if "საკონკ. ქულა" in display_data.columns:
-                st.metric("Average Score" if lang == "en" else "საშუალო ქულა", f"{display_data['საკონკ. ქულა'].mean():.1f}")
+            if overview["avg_score"] is not None:
+                st.metric("Average Score" if lang == "en" else "საშუალო ქულა", f"{overview['avg_score']:.1f}")
         with col4:
-            st.metric(t["universities"], display_data["უსდ"].nunique())
+            st.metric(t["universities"], overview["universities"])
+
+def year_over_year_view():
+    st.header(t["year_over_year_analysis"])
+
+    earlier = [other for other in sources if other < year]
+    if earlier:
+        st.caption(t["compared_with"].format(year=year, previous=max(earlier)))
+    else:
+        st.info(t["no_earlier_year"].format(year=year))
+        return
+
+    # Each year contributes only its small per-university and per-program totals, built
+    # once per version; the comparison itself merges a few hundred rows
+    yearly = {
+        other: tables.get_or_build(
+            (version, "year_totals"),
+            recorder.timed(
+                "year_totals",
+                lambda: {view: year_totals(load_base(sources[other], version), view) for view in ("university", "program")}
+            )
+        )
+        for other, version in versions.items()
+    }
+
+    for view, title in [("university", "uni_year_over_year"), ("program", "program_year_over_year")]:
+        comparison = tables.get_or_build(
+            (dataset_version, lang, "year_over_year", view, tuple(versions.items()), tuple(THRESHOLDS.items())),
+            recorder.timed(f"year_over_year.{view}", lambda: apply_translations(
+                year_over_year({other: totals[view] for other, totals in yearly.items()}, view, year, THRESHOLDS[view]),
+                lang, translations
+            ))
+        )
+        if view == "program":
+            comparison = comparison.drop(columns=["უსდ კოდი", "პროგ. კოდი"])
+        st.subheader(t[title])
+        show_table(translate_columns(comparison, lang))
 
-with tab5:
+# The methodology essays are long and only this view shows them, so they live in
+# methodology/<lang>.md and are read the first time the view runs
+@st.cache_data
+def load_methodology(lang):
+    return (Path(__file__).parent / "methodology" / f"{lang}.md").read_text(encoding="utf-8")
+
+def methodology_view():
     st.header("📖 " + (t["methodology"] if lang == "ka" else "Methodology"))
 
-    st.markdown(t["methodology_content"])
+    st.markdown(load_methodology(lang))
 
     # Add some summary statistics about the data
     st.subheader("📊 " + ("მონაცემთა შემაჯამებელი სტატისტიკა" if lang == "ka" else "Data Summary Statistics"))
@@ -845,37 +863,106 @@ with tab5:
     with col1:
         st.metric(
             "Total Records Processed",
-            f"{len(filtered_data):,}"
+            f"{overview['records']:,}"
         )
         st.metric(
             "Academic Records Only",
-            f"{len(display_data):,}"
+            f"{overview['records']:,}"
         )
 
     with col2:
-        universities_total = display_data["უსდ"].nunique()
-        universities_filtered = len(display_data.groupby(["უსდ კოდი", "უსდ"]).size()[display_data.groupby(["უსდ კოდი", "უსდ"]).size() >= 50])
         st.metric(
             "Total Universities",
-            universities_total
+            overview["universities"]
         )
         st.metric(
             "Universities (≥50 students)",
-            universities_filtered
+            overview["universities_ranked"]
         )
 
     with col3:
-        programs_total = display_data.groupby(["უსდ", "პროგრამა"]).size().shape[0]
-        programs_filtered = len(display_data.groupby(["უსდ", "პროგრამა"]).size()[display_data.groupby(["უსდ", "პროგრამა"]).size() >= 10])
         st.metric(
             "Total Programs",
-            programs_total
+            overview["programs"]
         )
         st.metric(
             "Programs (≥10 students)",
-            programs_filtered
+            overview["programs_ranked"]
         )
 
+VIEWS = {
+    "university_level": university_view,
+    "program_level": program_view,
+    "subject_level": subject_view,
+    "score_distributions": distribution_view,
+}
+# Comparisons need at least two releases
+if len(sources) > 1:
+    VIEWS["year_over_year"] = year_over_year_view
+VIEWS.update({"raw_data": raw_data_view, "methodology": methodology_view})
+
+def instrumented(name, view):
+    """view timed as the view.<name> stage; wraps keeps its name, which fragment ids are built from"""
+    if not recorder.enabled:
+        return view
+
+    @functools.wraps(view)
+    def timed_view():
+        # A fragment rerun skips the rest of the script and its begin_run, so it starts a run of its own
+        fragment = not recorder.in_run
+        if fragment:
+            recorder.begin_run("rerun.fragment")
+        try:
+            with recorder.stage(f"view.{name}"):
+                view()
+        finally:
+            if fragment:
+                recorder.end_run()
+    return timed_view
+
+if VIEW_MODE == "lazy":
+    # Only the selected view runs, and its own widgets rerun just that view
+    active_view = st.radio(
+        t["view"],
+        options=list(VIEWS),
+        format_func=lambda name: t[name],
+        horizontal=True,
+        label_visibility="collapsed",
+        key="active_view"
+    )
+    st.fragment(instrumented(active_view, VIEWS[active_view]))()
+else:
+    # Main content tabs
+    for tab, (name, view) in zip(st.tabs([t[name] for name in VIEWS]), VIEWS.items()):
+        with tab:
+            instrumented(name, view)()
+
+def operator_panel():
+    """Stage timings, cache counters and metric exports, for operators only"""
+    caches = [tables, row_cache(), export_cache(), figure_cache(), filter_cache(), distribution_cache(), INTERVALS]
+    with st.expander("Operator", expanded=True):
+        if recorder.enabled:
+            current = pd.DataFrame(recorder.records(run))
+            if not current.empty:
+                st.caption(f"Rerun {run}: {current.loc[current['stage'] == 'rerun', 'seconds'].sum() * 1000:.0f} ms")
+                st.dataframe(current.drop(columns=["time", "run"]), use_container_width=True)
+            st.dataframe(pd.DataFrame(recorder.summary()), use_container_width=True)
+        else:
+            st.caption("Set UNIDATA_METRICS=on to record stage timings")
+        st.dataframe(pd.DataFrame([cache.stats() for cache in caches]), use_container_width=True)
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("Metrics (JSON lines)", recorder.to_jsonl(), file_name="unidata_metrics.jsonl",
+                               mime="application/jsonl", on_click="ignore")
+        with col2:
+            st.download_button("Metrics (Prometheus)", recorder.to_prometheus(caches), file_name="unidata_metrics.prom",
+                               mime="text/plain", on_click="ignore")
+
+recorder.end_run()
+# Hidden unless switched on for the process, or asked for with ?operator=1 while metrics are recorded
+if OPERATOR or (recorder.enabled and st.query_params.get("operator") == "1"):
+    operator_panel()
+
 # Footer
 st.markdown("---")
 st.markdown(
@@ -0,0 +1 @@
+"""Data processing for the Georgian university grant dashboard"""
@@ -0,0 +1,5 @@
+import sys
+
+from unidata.cli import main
+
+sys.exit(main())
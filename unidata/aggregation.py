@@ -0,0 +1,307 @@
+"""Grant statistics for any grouping of the student data, computed in one vectorized pass
+
+Totals (grant sum, students per grant level and total students) are additive,
+so they are computed once on the Georgian names and codes, and the per-language
+rankings are derived from them by relabelling and merging the small result
+tables instead of the student rows.
+
+The totals themselves are rollups of a grant cube, students per cell of
+university x program x optional subject 1 x optional subject 2 x grant, so any
+combination of those dimensions, filtered on any of them, is answered from its
+few thousand cells instead of another pass over the student rows.
+
+Every ranked group also carries a bootstrap confidence interval of its mean
+grant and an empirical-Bayes shrunk mean, see unidata.uncertainty; both only
+need the same totals.
+"""
+import numpy as np
+import pandas as pd
+
+from unidata.uncertainty import bootstrap_interval, shrunk_means
+
+GRANT_COLUMN = "გრანტი %"
+GRANT_LEVELS = (50, 70, 100)
+
+SUM_COLUMN = "გრანტი % ჯამი"
+MEAN_COLUMN = "საშ. გრანტი %"
+COUNT_COLUMN = "სტუდ. რაოდ."
+LEVEL_COLUMNS = {level: f"სტუდ. {level}%" for level in GRANT_LEVELS}
+TOTAL_COLUMNS = [SUM_COLUMN, *LEVEL_COLUMNS.values(), COUNT_COLUMN]
+
+CI_LOW_COLUMN = "საშ. გრანტი % ქვედა ზღვარი"
+CI_HIGH_COLUMN = "საშ. გრანტი % ზედა ზღვარი"
+SHRUNK_COLUMN = "შესწ. საშ. გრანტი %"
+UNCERTAINTY_COLUMNS = [CI_LOW_COLUMN, CI_HIGH_COLUMN, SHRUNK_COLUMN]
+
+# What the ranking tables can be ordered by
+RANKINGS = {"mean": MEAN_COLUMN, "shrunk": SHRUNK_COLUMN}
+
+PROGRAMS_COLUMN = "პროგრამების რაოდ."
+
+UNIVERSITY_KEYS = ["უსდ კოდი", "უსდ"]
+PROGRAM_KEYS = ["უსდ კოდი", "უსდ", "პროგ. კოდი", "პროგრამა"]
+SUBJECT_KEYS = ["არჩევითი საგანი 1"]
+# Finest grouping the totals of each ranking view are kept at
+VIEW_KEYS = {"university": UNIVERSITY_KEYS, "program": PROGRAM_KEYS, "subject": SUBJECT_KEYS}
+
+
+def grant_totals(data, by, **extra):
+    """Grant sum, students per grant level and total students for each group
+
+    Extra keyword arguments are pandas named aggregations over other columns of
+    data and are evaluated in the same groupby pass.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    grant = data[GRANT_COLUMN]
+
+    # Narrow frame of the keys plus one indicator column per grant level
+    columns = {key: data[key] for key in by}
+    columns[GRANT_COLUMN] = grant
+    for level, name in LEVEL_COLUMNS.items():
+        columns[name] = grant.eq(level)
+    for column, _ in extra.values():
+        columns.setdefault(column, data[column])
+    frame = pd.DataFrame(columns)
+
+    aggregations = {SUM_COLUMN: (GRANT_COLUMN, "sum")}
+    aggregations.update({name: (name, "sum") for name in LEVEL_COLUMNS.values()})
+    aggregations[COUNT_COLUMN] = (GRANT_COLUMN, "size")
+    aggregations.update(extra)
+
+    return frame.groupby(by, observed=True).agg(**aggregations).reset_index()
+
+
+# Dimensions of the grant cube, each with the columns that identify and label it
+DIMENSIONS = {
+    "university": ["უსდ კოდი", "უსდ"],
+    "program": ["პროგ. კოდი", "პროგრამა"],
+    "subject1": ["არჩევითი საგანი 1"],
+    "subject2": ["არჩევითი საგანი 2"],
+    "grant": [GRANT_COLUMN],
+}
+CUBE_COLUMNS = [column for columns in DIMENSIONS.values() for column in columns]
+
+
+class GrantCube:
+    """Students per cell of university x program x optional subject 1 x optional subject 2 x grant
+
+    cells holds one row per combination of CUBE_COLUMNS that has students,
+    including missing subjects, with their number in COUNT_COLUMN. Since the
+    grant is a dimension, every total grant_totals computes is a sum of cells.
+    """
+
+    def __init__(self, cells):
+        self.cells = cells
+
+    @classmethod
+    def from_rows(cls, data):
+        """Cube of the student rows, built in one groupby pass"""
+        cells = data.groupby(CUBE_COLUMNS, observed=True, dropna=False).size()
+        return cls(cells.rename(COUNT_COLUMN).reset_index())
+
+    def __len__(self):
+        return len(self.cells)
+
+    @property
+    def students(self):
+        return int(self.cells[COUNT_COLUMN].sum())
+
+    @property
+    def mean_grant(self):
+        """Mean grant of every student in the cube"""
+        return float((self.cells[GRANT_COLUMN] * self.cells[COUNT_COLUMN]).sum() / self.students)
+
+    def select(self, where=None):
+        """Cells whose columns hold the given values, where maps a column to a value or a list of values"""
+        cells = self.cells
+        if not where:
+            return cells
+        keep = np.ones(len(cells), dtype=bool)
+        for column, value in where.items():
+            values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+            keep &= cells[column].isin(values).to_numpy()
+        return cells[keep]
+
+    def rollup(self, by, where=None, present=None):
+        """grant_totals of the students in the cells matching where, grouped by cube columns
+
+        present maps extra column names to cube columns, counting the students
+        with a value in that column. As in grant_totals, students missing a
+        by value are left out, and an empty by gives a single row of totals.
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        cells = self.select(where)
+        counts = cells[COUNT_COLUMN]
+        grant = cells[GRANT_COLUMN]
+
+        columns = {key: cells[key] for key in by}
+        columns[SUM_COLUMN] = grant * counts
+        for level, name in LEVEL_COLUMNS.items():
+            columns[name] = counts.where(grant.eq(level), 0)
+        columns[COUNT_COLUMN] = counts
+        for name, column in (present or {}).items():
+            columns[name] = counts.where(cells[column].notna(), 0)
+        frame = pd.DataFrame(columns)
+
+        if not by:
+            return pd.DataFrame([frame.sum()]).astype(frame.dtypes.to_dict())
+        return frame.groupby(by, observed=True).sum().reset_index()
+
+
+def consolidate(totals, by, min_students=0, extra=()):
+    """Merge totals sharing the same by labels and derive the mean grant
+
+    Only the additive total columns and the named extra columns are kept.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    summed = totals.groupby(by, observed=True)[TOTAL_COLUMNS + list(extra)].sum()
+    summed.insert(0, MEAN_COLUMN, summed.pop(SUM_COLUMN) / summed[COUNT_COLUMN])
+    summary = summed.reset_index()
+    # Result tables are small, so categorical keys go back to plain values for display
+    for key in by:
+        if isinstance(summary[key].dtype, pd.CategoricalDtype):
+            summary[key] = summary[key].astype(summary[key].cat.categories.dtype)
+    if min_students:
+        summary = summary[summary[COUNT_COLUMN] >= min_students]
+    return summary
+
+
+def level_values(summary):
+    """Students per grant value of every group of a summary, with those values
+
+    The first column counts the students without one of the grant levels,
+    valued at their mean, which keeps the group means exact; in the NAEC data
+    they all have 0.
+    """
+    levels = summary[list(LEVEL_COLUMNS.values())].to_numpy(dtype=np.int64)
+    sizes = summary[COUNT_COLUMN].to_numpy(dtype=np.int64)
+    rest = sizes - levels.sum(axis=1)
+    rest_sum = np.round(summary[MEAN_COLUMN].to_numpy() * sizes - levels @ np.array(GRANT_LEVELS, dtype=float), 6)
+    rest_value = np.divide(rest_sum, rest, out=np.zeros(len(rest)), where=rest > 0)
+    counts = np.column_stack([rest, levels])
+    values = np.column_stack([rest_value, np.broadcast_to(np.array(GRANT_LEVELS, dtype=float), levels.shape)])
+    return counts, values
+
+
+def with_uncertainty(summary):
+    """summary with the confidence interval and shrunk mean of every group after its mean grant"""
+    counts, values = level_values(summary)
+    low, high = bootstrap_interval(counts, values)
+    shrunk, _ = shrunk_means(counts, values)
+    position = summary.columns.get_loc(MEAN_COLUMN) + 1
+    for offset, (name, column) in enumerate(zip(UNCERTAINTY_COLUMNS, (low, high, shrunk))):
+        summary.insert(position + offset, name, column)
+    return summary
+
+
+def ranked_summary(totals, by, min_students=0, extra=()):
+    """consolidate plus the uncertainty columns, estimated before the small groups are dropped"""
+    summary = with_uncertainty(consolidate(totals, by, extra=extra))
+    if min_students:
+        summary = summary[summary[COUNT_COLUMN] >= min_students]
+    return summary
+
+
+def rank(table, by="mean"):
+    """A ranking table in its built order, by mean grant, or ordered by the shrunk mean"""
+    if by == "mean":
+        return table
+    # Stable, so ties keep their order by mean grant and name
+    return table.sort_values(RANKINGS[by], ascending=False, kind="stable")
+
+
+def grant_summary(data, by, min_students=0, **extra):
+    """Mean grant, students per grant level and total students for each group"""
+    return consolidate(grant_totals(data, by, **extra), by, min_students, extra=list(extra))
+
+
+# Minimum number of students for a university, program or subject to be ranked
+THRESHOLDS = {"university": 50, "program": 10, "subject": 20}
+
+BASE_GRANT = 2250
+MONEY_COLUMN = "სულ გრანტის თანხა (ლარი)"
+
+
+def university_table(totals, min_students):
+    """University ranking with grant level counts and total grant money"""
+    uni_data = ranked_summary(totals, UNIVERSITY_KEYS, min_students, extra=[PROGRAMS_COLUMN])
+    uni_data = uni_data.round({column: 2 for column in [MEAN_COLUMN, *UNCERTAINTY_COLUMNS]})
+    uni_data = uni_data.sort_values(MEAN_COLUMN, ascending=False)
+
+    uni_data = uni_data[[*UNIVERSITY_KEYS, MEAN_COLUMN, *UNCERTAINTY_COLUMNS, PROGRAMS_COLUMN,
+                         *LEVEL_COLUMNS.values(), COUNT_COLUMN]]
+    uni_data = uni_data.rename(columns={COUNT_COLUMN: "სულ სტუდ."})
+
+    # Grant money = (Grant % / 100) * 2250 * Number of students
+    uni_data[MONEY_COLUMN] = (uni_data[MEAN_COLUMN] / 100) * BASE_GRANT * uni_data["სულ სტუდ."]
+    return uni_data
+
+
+def program_table(totals, min_students):
+    """Program ranking, merging programs with the same name within a university regardless of code"""
+    prog_data = ranked_summary(totals, ["უსდ", "პროგრამა"], min_students)
+    return prog_data.sort_values([MEAN_COLUMN, "პროგრამა"], ascending=[False, True])
+
+
+def subject_table(totals, min_students):
+    """Optional subject 1 ranking"""
+    subject_data = ranked_summary(totals, SUBJECT_KEYS, min_students)
+    subject_data = subject_data.rename(columns={"არჩევითი საგანი 1": "არჩევითი საგანი"})
+    return subject_data.sort_values(MEAN_COLUMN, ascending=False)
+
+
+# Table builder of each ranking view, taking its totals and minimum number of students
+VIEW_TABLES = {"university": university_table, "program": program_table, "subject": subject_table}
+
+
+def view_totals(cube, view):
+    """Totals of one ranking view, rolled up from the cube"""
+    present = {PROGRAMS_COLUMN: "პროგრამა"} if view == "university" else None
+    return cube.rollup(VIEW_KEYS[view], present=present)
+
+
+def cube_aggregates(cube):
+    """Language independent totals at the finest grouping each ranking needs, rolled up from the cube"""
+    return {
+        "cube": cube,
+        **{view: view_totals(cube, view) for view in VIEW_KEYS},
+        "records": cube.students,
+        "avg_grant": cube.mean_grant,
+    }
+
+
+def base_aggregates(data):
+    """cube_aggregates of the student rows, plus the mean score, which the cube does not hold"""
+    base = cube_aggregates(GrantCube.from_rows(data))
+    base["avg_score"] = data["საკონკ. ქულა"].mean() if "საკონკ. ქულა" in data.columns else None
+    return base
+
+
+def build_aggregates(base, relabel=None, thresholds=THRESHOLDS):
+    """Every table the dashboard tabs display, for the language relabel translates names into
+
+    relabel takes a totals table and returns it with translated name columns;
+    it only ever sees the few hundred rows of the base totals.
+    """
+    relabel = relabel or (lambda table: table)
+    uni_totals = relabel(base["university"])
+    prog_totals = relabel(base["program"])
+    subject_totals = relabel(base["subject"])
+
+    uni_sizes = consolidate(uni_totals, UNIVERSITY_KEYS)[COUNT_COLUMN]
+    prog_sizes = consolidate(prog_totals, ["უსდ", "პროგრამა"])[COUNT_COLUMN]
+    overview = {
+        "records": base["records"],
+        "avg_grant": base["avg_grant"],
+        "avg_score": base["avg_score"],
+        "universities": uni_totals["უსდ"].nunique(),
+        "universities_ranked": int((uni_sizes >= thresholds["university"]).sum()),
+        "programs": len(prog_sizes),
+        "programs_ranked": int((prog_sizes >= thresholds["program"]).sum()),
+    }
+    return {
+        "university": university_table(uni_totals, thresholds["university"]),
+        "program": program_table(prog_totals, thresholds["program"]),
+        "subject": subject_table(subject_totals, thresholds["subject"]),
+        "overview": overview,
+    }
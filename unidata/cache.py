@@ -0,0 +1,130 @@
+"""Bounded in-process memo for tables derived from the dataset"""
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class _Build:
+    """A value being built, which other callers asking for the same key wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class LRUCache:
+    """Least-recently-used cache of built values with hit, miss and eviction counters
+
+    Each key is built once: callers asking for a key that is already being built
+    wait for that build instead of starting their own.
+    """
+
+    def __init__(self, max_entries=16, name="cache"):
+        self.max_entries = max_entries
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.waits = 0
+        self._entries = OrderedDict()
+        self._building = {}
+        self._lock = threading.RLock()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """Return the value stored under key, or default without building it; only hits are counted"""
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def get_or_build(self, key, build):
+        """Return the value stored under key, calling build() to create it on a miss"""
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            pending = self._building.get(key)
+            if pending is None:
+                self.misses += 1
+                pending = self._building[key] = _Build()
+                owner = True
+            else:
+                self.waits += 1
+                owner = False
+
+        if not owner:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.value
+
+        try:
+            value = build()
+        except BaseException as error:
+            pending.error = error
+            with self._lock:
+                del self._building[key]
+            pending.done.set()
+            raise
+        logger.info("%s miss for %r (%d hits, %d misses)", self.name, key, self.hits, self.misses)
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            del self._building[key]
+        pending.value = value
+        pending.done.set()
+        return value
+
+    def evict(self, key):
+        """Drop a single entry, returning whether it was present"""
+        with self._lock:
+            if key in self._entries:
+                del self._entries[key]
+                self.evictions += 1
+                return True
+            return False
+
+    def evict_where(self, predicate):
+        """Drop every entry whose key matches predicate, returning how many were dropped"""
+        with self._lock:
+            stale = [key for key in self._entries if predicate(key)]
+            for key in stale:
+                del self._entries[key]
+            self.evictions += len(stale)
+            return len(stale)
+
+    def clear(self):
+        """Drop all entries and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.waits = 0
+
+    def stats(self):
+        """Counters and occupancy, for logging or an operator view"""
+        with self._lock:
+            return {
+                "name": self.name,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "waits": self.waits,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }
@@ -0,0 +1,241 @@
+"""Command line entry point: python -m unidata build|inspect|query|years|translations|serve"""
+import argparse
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from unidata.aggregation import COUNT_COLUMN, DIMENSIONS, MEAN_COLUMN, SUM_COLUMN, THRESHOLDS
+from unidata.ingest import SOURCE_PATH, snapshot_path, source_version
+from unidata.pipeline import (
+    ARTIFACT_DIR, LANGUAGES, VIEWS, artifact_dir, build_artifacts, is_current, load_artifacts, read_manifest,
+)
+from unidata.years import DATA_DIR, translations_dir, year_sources
+
+
+def _year_source(args):
+    """Workbook of --year in the data store, exiting when that year has none"""
+    sources = year_sources(args.data, args.source)
+    if args.year not in sources:
+        raise SystemExit(f"No workbook for {args.year}, expected {args.data}/{args.year}/grants.xlsx")
+    return sources[args.year]
+
+
+def _up_to_date(source, root):
+    """Whether the artifacts of a workbook's current version are the ones load_artifacts accepts"""
+    version = source_version(source)
+    return is_current(read_manifest(version, root), version, THRESHOLDS)
+
+
+def build(args):
+    if args.all_years:
+        targets = year_sources(args.data, args.source).values()
+    elif args.year is not None:
+        targets = [_year_source(args)]
+    else:
+        targets = [args.source]
+
+    for source in targets:
+        # Each year is its own partition, years that did not change are left untouched
+        if args.all_years and _up_to_date(source, args.artifacts):
+            print(f"{source}: up to date in {artifact_dir(source_version(source), args.artifacts)}")
+            continue
+        translations = args.translations or translations_dir(source)
+        start = time.perf_counter()
+        target = build_artifacts(source, args.artifacts, THRESHOLDS, translations)
+        print(f"Built {target} from {source} in {time.perf_counter() - start:.2f}s")
+        for path in sorted(target.iterdir()):
+            print(f"  {path.name:<28} {path.stat().st_size:>10,} bytes")
+
+
+def inspect(args):
+    if args.year is not None:
+        args.source = _year_source(args)
+    version = source_version(args.source)
+    manifest = read_manifest(version, args.artifacts)
+    print(f"Source:    {args.source}")
+    print(f"Version:   {version}")
+    if manifest is None:
+        print(f"Artifacts: none in {artifact_dir(version, args.artifacts)}, run `python -m unidata build`")
+        return 1
+    print(f"Artifacts: {artifact_dir(version, args.artifacts)} (built {manifest['built_at']})")
+    print(f"Records:   {manifest['base']['records']:,}")
+
+    artifacts = load_artifacts(version, THRESHOLDS, args.artifacts)
+    if artifacts is None:
+        print("Artifacts were built with different thresholds or format, rebuild them")
+        return 1
+    with pd.option_context("display.width", 160, "display.max_colwidth", 60):
+        for view in VIEWS:
+            table = artifacts[args.lang][view]
+            print(f"\n{view.capitalize()} ({len(table)} ranked, top {args.top} by {MEAN_COLUMN})")
+            print(table.head(args.top).to_string(index=False))
+    return 0
+
+
+def _where(condition):
+    """--where DIMENSION=VALUE as (column, value): codes and grants match numerically, names as written"""
+    dimension, _, value = condition.partition("=")
+    if dimension not in DIMENSIONS or not value:
+        raise SystemExit(f"--where expects DIMENSION=VALUE with DIMENSION one of {', '.join(DIMENSIONS)}")
+    columns = DIMENSIONS[dimension]
+    try:
+        return columns[0], pd.to_numeric(value)
+    except ValueError:
+        return columns[-1], value
+
+
+def query(args):
+    from unidata.aggregation import GrantCube, consolidate
+    from unidata.pipeline import apply_translations, load_analysis_rows, translate_columns
+    from unidata.translations import read_translations
+
+    if args.year is not None:
+        args.source = _year_source(args)
+    start = time.perf_counter()
+    artifacts = load_artifacts(source_version(args.source), THRESHOLDS, args.artifacts)
+    cube = artifacts["base"]["cube"] if artifacts else GrantCube.from_rows(load_analysis_rows(args.source))
+    loaded = time.perf_counter() - start
+
+    by = [column for dimension in args.by for column in DIMENSIONS[dimension]]
+    where = {}
+    for condition in args.where:
+        column, value = _where(condition)
+        where.setdefault(column, []).append(value)
+    start = time.perf_counter()
+    totals = cube.rollup(by, where)
+    if by:
+        table = consolidate(totals, by, args.min_students).sort_values(MEAN_COLUMN, ascending=False)
+    else:
+        table = totals
+        table.insert(0, MEAN_COLUMN, table.pop(SUM_COLUMN) / table[COUNT_COLUMN])
+    elapsed = time.perf_counter() - start
+    if args.lang == "en":
+        table = translate_columns(apply_translations(table, "en", read_translations(translations_dir(args.source))), "en")
+
+    print(f"{len(table)} groups from {len(cube):,} cube cells in {elapsed * 1000:.1f} ms "
+          f"(cube {'read with the artifacts' if artifacts else 'built from the rows'} in {loaded * 1000:.0f} ms)")
+    with pd.option_context("display.max_rows", args.top, "display.width", 160, "display.max_colwidth", 60):
+        print(table.head(args.top).round(2).to_string(index=False))
+    return 0
+
+
+def years(args):
+    sources = year_sources(args.data, args.source)
+    if not sources:
+        print(f"No workbooks found in {args.data}/<year>/ or at {args.source}")
+        return 1
+    for year, source in sources.items():
+        version = source_version(source)
+        snapshot = "snapshot" if snapshot_path(source, version).exists() else "no snapshot"
+        artifacts = "artifacts" if _up_to_date(source, args.artifacts) else "no artifacts"
+        print(f"{year}  {str(source):<28} {version[:16]}  {snapshot:<11}  {artifacts:<12}  {translations_dir(source)}")
+    return 0
+
+
+def serve(args):
+    # Imported here, the other commands do not need Streamlit
+    from unidata.warmup import serve as serve_app
+
+    streamlit_args = args.streamlit_args[1:] if args.streamlit_args[:1] == ["--"] else args.streamlit_args
+    return serve_app(args.script, args.port, args.ready_port, args.ready_file, streamlit_args,
+                     warm=not args.no_warmup, timeout=args.timeout)
+
+
+def translations(args):
+    from unidata.pipeline import load_rows
+    from unidata.translations import (
+        PROGRAMS_FILE, UNIVERSITIES_FILE, TranslationTable, compiled_paths, translations_version, untranslated,
+        write_translations,
+    )
+
+    source = _year_source(args) if args.year is not None else args.source
+    directory = Path(args.translations or translations_dir(source))
+    digest = translations_version(directory)
+    if digest is None:
+        raise SystemExit(f"No {UNIVERSITIES_FILE} and {PROGRAMS_FILE} in {directory}")
+
+    start = time.perf_counter()
+    universities, programs = write_translations(directory)
+    elapsed = time.perf_counter() - start
+    json_size = sum((directory / name).stat().st_size for name in (UNIVERSITIES_FILE, PROGRAMS_FILE))
+    paths = compiled_paths(directory, digest)
+    print(f"Compiled {len(universities)} universities and {len(programs)} programs in {elapsed * 1000:.0f} ms: "
+          f"{json_size / 1024:.0f} KB of JSON, {sum(path.stat().st_size for path in paths) / 1024:.0f} KB compiled to "
+          f"{', '.join(str(path) for path in paths)}")
+    unlisted = programs[programs["university_code"] < 0]
+    if len(unlisted):
+        print(f"{len(unlisted)} programs name a university missing from {UNIVERSITIES_FILE}: "
+              f"{', '.join(sorted(unlisted['university'].str.strip().unique()))}")
+
+    table = TranslationTable(directory)
+    start = time.perf_counter()
+    table.programs
+    print(f"Compiled tables load in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    missing = untranslated(load_rows(source, columns=["უსდ კოდი", "უსდ", "პროგ. კოდი", "პროგრამა"]), table)
+    if missing.empty:
+        print(f"Every program in {source} has an English name")
+        return 0
+    print(f"{len(missing)} programs in {source} have no English name ({missing['students'].sum()} students):")
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        print(missing.to_string(index=False))
+    return 1 if args.strict else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m unidata", description=__doc__)
+    parser.add_argument("--source", default=SOURCE_PATH, help="grants workbook (default: %(default)s)")
+    parser.add_argument("--artifacts", default=ARTIFACT_DIR, help="artifact root directory (default: %(default)s)")
+    parser.add_argument("--data", default=DATA_DIR, help="year-partitioned data directory (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = commands.add_parser("build", help="precompute the dashboard tables for both languages")
+    build_parser.add_argument("--translations", help="directory of universities.json and programs.json "
+                                                     "(default: the year's own directory, else the current one)")
+    build_parser.add_argument("--year", type=int, help="build the year stored in the data directory instead of --source")
+    build_parser.add_argument("--all-years", action="store_true", help="build every year whose artifacts are missing or stale")
+    build_parser.set_defaults(func=build)
+
+    inspect_parser = commands.add_parser("inspect", help="print a summary of the built artifacts")
+    inspect_parser.add_argument("--lang", choices=LANGUAGES, default="en")
+    inspect_parser.add_argument("--top", type=int, default=5)
+    inspect_parser.add_argument("--year", type=int, help="inspect the year stored in the data directory instead of --source")
+    inspect_parser.set_defaults(func=inspect)
+
+    query_parser = commands.add_parser("query", help="grant totals for any grouping and filter, rolled up from the grant cube")
+    query_parser.add_argument("--by", nargs="*", default=[], choices=list(DIMENSIONS),
+                              help="dimensions to group by, none for the overall totals")
+    query_parser.add_argument("--where", action="append", default=[], metavar="DIMENSION=VALUE",
+                              help="keep the students with this name or code, repeat to combine; "
+                                   "values of the same dimension are alternatives")
+    query_parser.add_argument("--min-students", type=int, default=0)
+    query_parser.add_argument("--lang", choices=LANGUAGES, default="ka")
+    query_parser.add_argument("--top", type=int, default=20)
+    query_parser.add_argument("--year", type=int, help="query the year stored in the data directory instead of --source")
+    query_parser.set_defaults(func=query)
+
+    years_parser = commands.add_parser("years", help="list the years in the data store and what is built for them")
+    years_parser.set_defaults(func=years)
+
+    translations_parser = commands.add_parser(
+        "translations", help="compile the translation files to code-keyed tables and list untranslated programs")
+    translations_parser.add_argument("--translations", help="directory of universities.json and programs.json "
+                                                            "(default: the year's own directory, else the current one)")
+    translations_parser.add_argument("--year", type=int, help="check the year stored in the data directory instead of --source")
+    translations_parser.add_argument("--strict", action="store_true", help="exit non-zero when a program has no English name")
+    translations_parser.set_defaults(func=translations)
+
+    serve_parser = commands.add_parser("serve", help="run the app and warm every cache before reporting ready")
+    serve_parser.add_argument("--script", default="main.py")
+    serve_parser.add_argument("--port", type=int, default=8501, help="port of the app (default: %(default)s)")
+    serve_parser.add_argument("--ready-port", type=int, help="answer GET /ready on this port, 503 until warm")
+    serve_parser.add_argument("--ready-file", help="file written once warm and removed otherwise")
+    serve_parser.add_argument("--timeout", type=int, default=60, help="seconds to wait for the server to start")
+    serve_parser.add_argument("--no-warmup", action="store_true", help="report ready as soon as the server is up")
+    serve_parser.add_argument("streamlit_args", nargs=argparse.REMAINDER,
+                              help="further `streamlit run` options, after --")
+    serve_parser.set_defaults(func=serve)
+
+    args = parser.parse_args(argv)
+    return args.func(args) or 0
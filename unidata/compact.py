@@ -0,0 +1,61 @@
+"""Compact in-memory representation of the student data"""
+import numpy as np
+import pandas as pd
+
+# Text columns with fewer distinct values than this share of rows become categoricals
+CATEGORY_RATIO = 0.5
+
+
+def _narrow_float(values):
+    """float32 when every value survives the round trip at three decimals, else unchanged"""
+    narrowed = values.astype("float32")
+    if np.array_equal(narrowed.astype("float64").round(3), values.round(3), equal_nan=True):
+        return narrowed
+    return values
+
+
+def compact_frame(data):
+    """Return a copy of data with categorical text and the narrowest numeric dtypes that fit"""
+    columns = {}
+    for col in data.columns:
+        values = data[col]
+        if values.dtype == object:
+            if values.nunique(dropna=True) < CATEGORY_RATIO * len(values):
+                values = values.astype("category")
+            else:
+                values = values.astype("string[pyarrow]")
+        elif pd.api.types.is_float_dtype(values):
+            # Floats stay floats, even whole ones, so exports still write 50.0 rather than 50
+            values = _narrow_float(values)
+        elif pd.api.types.is_integer_dtype(values):
+            values = pd.to_numeric(values, downcast="integer")
+        columns[col] = values
+    return pd.DataFrame(columns, index=data.index)
+
+
+def memory_report(before, after):
+    """Bytes per column before and after compaction, with a total row"""
+    report = pd.DataFrame({
+        "dtype before": before.dtypes.astype(str),
+        "bytes before": before.memory_usage(index=False, deep=True),
+        "dtype after": after.dtypes.astype(str),
+        "bytes after": after.memory_usage(index=False, deep=True),
+    })
+    report.loc["total"] = ["", report["bytes before"].sum(), "", report["bytes after"].sum()]
+    report["ratio"] = report["bytes after"] / report["bytes before"]
+    return report
+
+
+if __name__ == "__main__":
+    from unidata.ingest import read_grants
+
+    data = read_grants()
+    from unidata.exports import export_bytes
+
+    data = data[data["აკად/მოსამზად"] == "აკად"].fillna({"გრანტი %": 0})
+    compact = compact_frame(data)
+    with pd.option_context("display.width", 200, "display.max_columns", 10):
+        print(memory_report(data, compact))
+    # Compaction only changes the in-memory dtypes, never what the exports write
+    assert export_bytes(data) == export_bytes(compact), "compact_frame changed the CSV export"
+    print("CSV export unchanged")
@@ -0,0 +1,162 @@
+"""Cross-filtering of the student rows through bitmap indexes
+
+Clicking a university, program or subject, or narrowing a score range,
+filters every other view to the matching students. Rather than masking and
+regrouping the rows on each click, every filter dimension is indexed once:
+the rows are factorized into value codes and kept ordered by code, so the
+rows of any value are one slice, and each value's row set is packed into a
+bitmap, one bit per row, the first time a filter uses it. A combination of
+filters is the OR of the bitmaps of each dimension's selected values, ANDed
+across dimensions.
+
+As in other cross-filtering dashboards, a view ignores the filter on the
+dimension it groups by, so the university ranking still lists every
+university after one is clicked. A view's table therefore only depends on
+the other dimensions' filters, and `view_filters` gives that part as a cache
+key: a click only recomputes the views whose key changed, from a grant cube
+of just the matching rows.
+"""
+import numpy as np
+import pandas as pd
+
+from unidata.aggregation import CUBE_COLUMNS, VIEW_TABLES, GrantCube, view_totals
+
+# Categorical dimensions that can be filtered on, by value
+FILTER_COLUMNS = ["უსდ", "პროგრამა", "არჩევითი საგანი 1", "არჩევითი საგანი 2", "არჩევანი"]
+# Score columns that can be filtered on, by range, in bins of this many points
+SCORE_BINS = {"საკონკ. ქულა": 50}
+
+# The dimension each view groups by, whose own filter does not apply to it
+VIEW_DIMENSIONS = {"university": "უსდ", "program": "პროგრამა", "subject": "არჩევითი საგანი 1"}
+
+# Set bits of every byte value; np.bitwise_count needs numpy 2
+POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+
+
+class BitmapIndex:
+    """Positional and bitmap index of the filter dimensions of a set of rows
+
+    For each column the distinct values are sorted, and the rows of the value
+    with code c are order[starts[c]:starts[c + 1]]. Score columns are indexed
+    by bin, with values holding each bin's lower edge. Bitmaps are numpy
+    arrays of packed bits, built per value on first use and then kept.
+    """
+
+    def __init__(self, data, columns=FILTER_COLUMNS, bins=SCORE_BINS):
+        self.size = len(data)
+        self.widths = {column: width for column, width in bins.items() if column in data.columns}
+        self.values = {}
+        self._order = {}
+        self._starts = {}
+        self._bitmaps = {}
+        for column in [col for col in columns if col in data.columns] + list(self.widths):
+            if column in self.widths:
+                scores = data[column].to_numpy(dtype=float)
+                keys = np.floor(scores / self.widths[column]) * self.widths[column]
+                codes, values = pd.factorize(keys, sort=True)
+            else:
+                codes, values = pd.factorize(data[column], sort=True)
+            # Rows with a missing value get code -1 and sort first, outside every slice
+            order = np.argsort(codes, kind="stable")
+            self._order[column] = order
+            self._starts[column] = np.searchsorted(codes[order], np.arange(len(values) + 1))
+            self.values[column] = pd.Index(values).tolist()
+
+    @property
+    def empty(self):
+        """A bitmap with no row set"""
+        return np.zeros((self.size + 7) // 8, dtype=np.uint8)
+
+    def rows_of(self, column, code):
+        """Positions of the rows holding a column's value code, in row order"""
+        return self._order[column][self._starts[column][code]:self._starts[column][code + 1]]
+
+    def bitmap(self, column, code):
+        """Packed bitmap of the rows holding a column's value code"""
+        key = (column, code)
+        if key not in self._bitmaps:
+            mask = np.zeros(self.size, dtype=bool)
+            mask[self.rows_of(column, code)] = True
+            self._bitmaps[key] = np.packbits(mask)
+        return self._bitmaps[key]
+
+    def codes(self, column, selection):
+        """Value codes a filter selects: a list of values, or a (low, high) range of a score column"""
+        if column in self.widths:
+            low, high = selection
+            return [code for code, edge in enumerate(self.values[column])
+                    if low <= edge and edge + self.widths[column] <= high]
+        codes = pd.Index(self.values[column]).get_indexer(list(selection))
+        return [int(code) for code in codes if code >= 0]
+
+    def select(self, filters, exclude=None):
+        """Bitmap of the rows passing every filter but exclude's, None when no filter applies
+
+        filters maps columns to their selection, see codes; empty selections
+        do not filter.
+        """
+        selected = None
+        for column, selection in filters.items():
+            if column == exclude or not selection:
+                continue
+            codes = self.codes(column, selection)
+            union = np.bitwise_or.reduce([self.bitmap(column, code) for code in codes]) if codes else self.empty
+            selected = union if selected is None else selected & union
+        return selected
+
+    def mask(self, bitmap):
+        """Boolean row mask of a bitmap"""
+        return np.unpackbits(bitmap, count=self.size).view(bool)
+
+    def positions(self, bitmap):
+        """Row positions set in a bitmap, in row order"""
+        return np.flatnonzero(np.unpackbits(bitmap, count=self.size))
+
+    def count(self, bitmap):
+        return int(POPCOUNT[bitmap].sum())
+
+
+def view_filters(filters, view):
+    """The filters that apply to a view, as a hashable key; () when none does"""
+    own = VIEW_DIMENSIONS.get(view)
+    return tuple((column, tuple(selection)) for column, selection in filters.items()
+                 if selection and column != own)
+
+
+def filtered_table(index, data, view, filters, min_students):
+    """A view's ranking table of the rows passing the filters that apply to it
+
+    data holds the rows index was built from, with the grant cube columns;
+    only the selected rows are grouped, through a cube of their own.
+    """
+    bitmap = index.select(dict(filters), exclude=VIEW_DIMENSIONS.get(view))
+    rows = data[CUBE_COLUMNS] if bitmap is None else data[CUBE_COLUMNS].take(index.positions(bitmap))
+    cube = GrantCube.from_rows(rows)
+    return VIEW_TABLES[view](view_totals(cube, view), min_students)
+
+
+if __name__ == "__main__":
+    import time
+
+    from unidata.aggregation import THRESHOLDS
+    from unidata.pipeline import load_rows
+
+    data = load_rows(columns=list(dict.fromkeys(CUBE_COLUMNS + FILTER_COLUMNS + list(SCORE_BINS))))
+    start = time.perf_counter()
+    index = BitmapIndex(data)
+    print(f"indexed {len(data):,} rows on {len(index.values)} columns in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    subject = data["არჩევითი საგანი 1"].value_counts().index[0]
+    university = data["უსდ"].value_counts().index[0]
+    filters = {"არჩევითი საგანი 1": [subject], "უსდ": [university], "საკონკ. ქულა": (1700, 2000)}
+    start = time.perf_counter()
+    bitmap = index.select(filters)
+    selected = time.perf_counter() - start
+    masked = (data["არჩევითი საგანი 1"].eq(subject) & data["უსდ"].eq(university)
+              & data["საკონკ. ქულა"].between(1700, 2000, inclusive="left"))
+    print(f"{index.count(bitmap):,} rows selected in {selected * 1000:.2f} ms, boolean masks agree: "
+          f"{bool((index.mask(bitmap) == masked.to_numpy()).all())}")
+    for view in VIEW_DIMENSIONS:
+        start = time.perf_counter()
+        table = filtered_table(index, data, view, view_filters(filters, view), THRESHOLDS[view])
+        print(f"{view:<10} {len(table):>4} rows in {(time.perf_counter() - start) * 1000:6.1f} ms")
@@ -0,0 +1,47 @@
+"""File exports of the raw rows and summary tables, written in chunks"""
+import gzip
+import io
+import zipfile
+
+from unidata.ingest import as_written
+
+EXPORT_FORMATS = {
+    "csv": {"extension": "csv", "mime": "text/csv"},
+    "csv.gz": {"extension": "csv.gz", "mime": "application/gzip"},
+    "parquet": {"extension": "parquet", "mime": "application/vnd.apache.parquet"},
+}
+
+CHUNK_ROWS = 10000
+
+
+def write_csv(data, stream, chunk_rows=CHUNK_ROWS):
+    """Write data as UTF-8 CSV to a binary stream, a block of rows at a time, scores as_written"""
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="", write_through=True)
+    for start in range(0, max(len(data), 1), chunk_rows):
+        as_written(data.iloc[start:start + chunk_rows]).to_csv(text, index=False, header=start == 0)
+    text.detach()
+
+
+def export_bytes(data, fmt="csv"):
+    """Encode data in one of EXPORT_FORMATS"""
+    buffer = io.BytesIO()
+    if fmt == "csv":
+        write_csv(data, buffer)
+    elif fmt == "csv.gz":
+        with gzip.GzipFile(fileobj=buffer, mode="wb", mtime=0) as compressed:
+            write_csv(data, compressed)
+    elif fmt == "parquet":
+        data.to_parquet(buffer, index=False)
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+    return buffer.getvalue()
+
+
+def summary_bundle(tables):
+    """Zip archive with one CSV per named summary table"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, table in tables.items():
+            with archive.open(f"{name}.csv", "w") as member:
+                write_csv(table, member)
+    return buffer.getvalue()
@@ -0,0 +1,319 @@
+"""Plotly figures of the analysis views, built once per view, language and table
+
+The figures only depend on the aggregate tables and the interface labels, so
+the app builds them once per dataset version and language and keeps their
+serialized specs across reruns and sessions. st.plotly_chart copies a live
+figure and serializes it again on every rerun; a cached spec skips both.
+
+Plotly Express takes about a tenth of a second to import, so it is imported
+by the first figure build rather than with this module, which keeps it off
+the app's startup and out of views without charts.
+"""
+import functools
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from unidata.aggregation import LEVEL_COLUMNS, MONEY_COLUMN
+
+LEVEL_COLORS = {50: "lightblue", 70: "orange", 100: "green"}
+
+# Interface labels the figures use, looked up in the app's translations
+LABEL_KEYS = (
+    "avg_grant_by_uni", "grant_dist_sorted", "grant_money_pie", "top_30_title",
+    "avg_grant_by_subject", "50_grant", "70_grant", "100_grant",
+)
+
+
+def _level_traces(fig, table, labels, x, hover_label, customdata=None):
+    """One stacked bar trace per grant level"""
+    import plotly.graph_objects as go
+
+    for level, column in LEVEL_COLUMNS.items():
+        name = labels[f"{level}_grant"]
+        fig.add_trace(go.Bar(
+            name=name,
+            x=x,
+            y=table[column],
+            hovertemplate=f"<b>{hover_label}</b><br>{name}: %{{y}}<extra></extra>",
+            customdata=customdata,
+            marker_color=LEVEL_COLORS[level]
+        ))
+
+
+def grant_bar(uni_data, labels, lang):
+    """Average grant per university, colored by the same value"""
+    import plotly.express as px
+
+    fig = px.bar(uni_data,
+                 x="უსდ", y="საშ. გრანტი %",
+                 title=labels["avg_grant_by_uni"],
+                 color="საშ. გრანტი %",
+                 color_continuous_scale="Viridis",
+                 hover_data=["სულ სტუდ."])
+    fig.update_layout(
+        xaxis_title="",
+        xaxis_showticklabels=False,
+        height=400,
+        margin=dict(l=20, r=20, t=40, b=20),
+        font=dict(size=10),
+        title_font_size=14,
+        coloraxis_showscale=False  # Hide color scale on mobile
+    )
+    # Update hover template to show university names properly
+    fig.update_traces(
+        hovertemplate='<b>%{x}</b><br>' +
+                      ('Avg Grant %' if lang == "en" else 'საშ. გრანტი %') + ': %{y:.1f}%<br>' +
+                      ('Total Students' if lang == "en" else 'სულ სტუდ.') + ': %{customdata[0]}<extra></extra>'
+    )
+    return fig
+
+
+def grant_levels_bar(uni_data, labels, lang):
+    """Students per grant level for each university, stacked"""
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    _level_traces(fig, uni_data, labels, uni_data["უსდ"].to_numpy(), "%{x}")
+    fig.update_layout(
+        barmode='stack',
+        title=labels["grant_dist_sorted"],
+        xaxis_title="",
+        yaxis_title='Students' if lang == "en" else 'სტუდ.',
+        xaxis_showticklabels=False,
+        height=450,  # Increased height to accommodate legend underneath
+        margin=dict(l=20, r=20, t=40, b=80),  # Increased bottom margin for legend
+        font=dict(size=10),
+        title_font_size=14,
+        showlegend=True,  # Show legend - will be hidden on mobile via CSS
+        legend=dict(
+            orientation="h",  # Horizontal legend underneath
+            yanchor="top",
+            y=-0.15,  # Position below the chart
+            xanchor="center",
+            x=0.5,
+            font=dict(size=10)
+        )
+    )
+    return fig
+
+
+def money_pie(uni_data, labels, lang):
+    """Share of the total grant money per university"""
+    import plotly.express as px
+
+    fig = px.pie(uni_data,
+                 values=MONEY_COLUMN,
+                 names='უსდ',
+                 title=labels["grant_money_pie"],
+                 hover_data=['სულ სტუდ.', 'საშ. გრანტი %'])
+    fig.update_traces(
+        textposition='inside',
+        textinfo='percent',
+        textfont_size=9
+    )
+    fig.update_layout(
+        height=450,  # Increased height for legend
+        margin=dict(l=10, r=10, t=40, b=80),  # Increased bottom margin for legend
+        font=dict(size=9),
+        title_font_size=14,
+        showlegend=False  # Remove legend from pie chart
+    )
+    return fig
+
+
+def top_programs_bar(prog_data, labels, lang, top=30):
+    """Students per grant level for the top ranked programs, stacked"""
+    import plotly.graph_objects as go
+
+    top_programs = prog_data.head(top)
+    fig = go.Figure()
+    _level_traces(fig, top_programs, labels, np.arange(len(top_programs)), "%{customdata}",
+                  customdata=top_programs["პროგრამა"].to_numpy())
+    fig.update_layout(
+        barmode='stack',
+        title=labels["top_30_title"],
+        xaxis_title="",
+        yaxis_title='Students' if lang == "en" else 'სტუდ.',
+        xaxis_showticklabels=False,
+        height=550,  # Increased height for legend
+        margin=dict(l=20, r=20, t=40, b=80),  # Increased bottom margin for legend
+        font=dict(size=10),
+        title_font_size=14,
+        showlegend=True,  # Show legend - will be hidden on mobile via CSS
+        legend=dict(
+            orientation="h",  # Horizontal legend underneath
+            yanchor="top",
+            y=-0.12,  # Position below the chart
+            xanchor="center",
+            x=0.5,
+            font=dict(size=10)
+        )
+    )
+    return fig
+
+
+def subject_bar(subject_data, labels, lang):
+    """Average grant per optional subject, colored by the same value"""
+    import plotly.express as px
+
+    fig = px.bar(subject_data,
+                 x="არჩევითი საგანი", y="საშ. გრანტი %",
+                 title=labels["avg_grant_by_subject"],
+                 color="საშ. გრანტი %",
+                 color_continuous_scale="Viridis",
+                 hover_data=["სტუდ. რაოდ."])
+    fig.update_layout(
+        xaxis_title="",
+        xaxis_tickangle=45,
+        height=450,
+        margin=dict(l=20, r=20, t=40, b=80),
+        font=dict(size=10),
+        title_font_size=14,
+        coloraxis_showscale=False,  # Hide color scale
+        xaxis=dict(
+            tickfont=dict(size=8)
+        )
+    )
+    return fig
+
+
+def score_distribution_lines(histogram, labels, lang, score_label):
+    """Share of each group's students per score bin, one stepped line per group
+
+    histogram is a ScoreDistribution.histogram table: the bin edges, then one
+    column of counts per group.
+    """
+    import plotly.graph_objects as go
+
+    centers = ((histogram["from"] + histogram["to"]) / 2).to_numpy()
+    share_label = 'Students %' if lang == "en" else 'სტუდ. %'
+    fig = go.Figure()
+    for name in histogram.columns[2:]:
+        counts = histogram[name].to_numpy()
+        fig.add_trace(go.Scatter(
+            x=centers,
+            y=np.round(counts / max(counts.sum(), 1) * 100, 2),
+            mode="lines",
+            line_shape="hvh",
+            name=name,
+            hovertemplate=f"<b>{name}</b><br>{score_label}: %{{x}}<br>{share_label}: %{{y:.1f}}%<extra></extra>"
+        ))
+    fig.update_layout(
+        title=labels["distribution_title"],
+        xaxis_title=score_label,
+        yaxis_title=share_label,
+        height=450,
+        margin=dict(l=20, r=20, t=40, b=80),
+        font=dict(size=10),
+        title_font_size=14,
+        legend=dict(orientation="h", yanchor="top", y=-0.15, xanchor="center", x=0.5, font=dict(size=9))
+    )
+    return fig
+
+
+# Figures of each view, in display order, with the aggregate table they draw
+VIEW_FIGURES = {
+    "university": {"grant": grant_bar, "grant_levels": grant_levels_bar, "money": money_pie},
+    "program": {"top_programs": top_programs_bar},
+    "subject": {"subject": subject_bar},
+}
+
+
+# The filter column a click on a figure selects, and the field of the clicked point holding its value
+FIGURE_FILTERS = {
+    "grant": ("უსდ", "x"),
+    "grant_levels": ("უსდ", "x"),
+    "money": ("უსდ", "label"),
+    "top_programs": ("პროგრამა", "customdata"),
+    "subject": ("არჩევითი საგანი 1", "x"),
+}
+
+
+@functools.cache
+def _spec_figure_type():
+    """A go.Figure rendered from a serialized spec, defined on first use so plotly is imported with the first chart"""
+    import plotly.graph_objects as go
+
+    class SpecFigure(go.Figure):
+        """Figure whose dict form is its spec, parsed once, so st.plotly_chart neither copies nor validates it"""
+
+        def __init__(self, spec):
+            super().__init__()
+            self._spec = json.loads(spec)
+
+        def to_dict(self):
+            return self._spec
+
+        def to_plotly_json(self):
+            return self._spec
+
+    return SpecFigure
+
+
+def figure_spec(fig):
+    """A figure serialized once, the way st.plotly_chart sends it, ready to render again"""
+    import plotly.io as pio
+
+    return _spec_figure_type()(pio.to_json(fig, validate=False))
+
+
+def build_figures(view, table, labels, lang):
+    """The serialized spec of every figure of a view, keyed by name"""
+    return {name: figure_spec(build(table, labels, lang)) for name, build in VIEW_FIGURES[view].items()}
+
+
+def _render_spec(fig):
+    """The spec st.plotly_chart sends for a figure: its dict form, serialized without validation"""
+    import plotly.io as pio
+    import plotly.tools
+
+    return pio.to_json(plotly.tools.return_figure_from_figure_or_data(fig, validate_figure=True), validate=False)
+
+
+def _timed(func, *args):
+    """func's result and its run time in milliseconds"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def figure_report(aggregates, labels, lang):
+    """Per figure, the build time and what each rerun costs to render it from a live figure
+    (before) and from its cached spec (after), with the size of the spec each sends"""
+    rows = []
+    for view, builders in VIEW_FIGURES.items():
+        for name, build in builders.items():
+            fig, build_ms = _timed(build, aggregates[view], labels, lang)
+            cached, spec_ms = _timed(figure_spec, fig)
+            before, before_ms = _timed(_render_spec, fig)
+            after, after_ms = _timed(_render_spec, cached)
+            if json.loads(before) != json.loads(after):
+                raise ValueError(f"{view}.{name}: the cached spec renders a different chart")
+            rows.append({
+                "figure": f"{view}.{name}",
+                "build_ms": build_ms,
+                "spec_ms": spec_ms,
+                "before_ms": before_ms,
+                "after_ms": after_ms,
+                "before_bytes": len(before.encode()),
+                "after_bytes": len(after.encode()),
+            })
+    return rows
+
+
+if __name__ == "__main__":
+    from unidata.pipeline import load_artifacts, load_rows, localize
+    from unidata.aggregation import base_aggregates
+    from unidata.ingest import source_version
+    from unidata.translations import read_translations
+
+    aggregates = load_artifacts(source_version())
+    if aggregates is None:
+        aggregates = {"en": localize(base_aggregates(load_rows()), "en", read_translations())}
+    report = pd.DataFrame(figure_report(aggregates["en"], {key: key for key in LABEL_KEYS}, "en"))
+    report.loc[len(report)] = ["total", *report.drop(columns="figure").sum()]
+    report[["before_bytes", "after_bytes"]] = report[["before_bytes", "after_bytes"]].astype(int)
+    print(report.to_string(index=False, float_format="{:.1f}".format))
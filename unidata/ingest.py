@@ -0,0 +1,194 @@
+"""Ingest of the NAEC grants workbook into a typed columnar snapshot"""
+import hashlib
+import os
+import time
+from pathlib import Path
+
+import pandas as pd
+
+SOURCE_PATH = "grants.xlsx"
+SNAPSHOT_DIR = ".snapshots"
+
+# Programs students were admitted to, as opposed to preparatory ones
+ACADEMIC_COLUMN = "აკად/მოსამზად"
+ACADEMIC = "აკად"
+
+# Score columns the workbook mixes with "-" placeholders for preparatory students
+NUMERIC_COLUMNS = [
+    "ქართული ენა ნედლი ქულა", "ქართული ენა სკალ.",
+    "უცხო ენა ნედლი ქულა", "უცხო ენა სკალ.",
+]
+
+
+def file_hash(path):
+    """Return the sha256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+_VERSIONS = {}
+
+
+def source_version(path=SOURCE_PATH):
+    """Content hash of the source file, recomputed only when its size or mtime changes"""
+    stat = os.stat(path)
+    key = (os.fspath(path), stat.st_mtime_ns, stat.st_size)
+    if key not in _VERSIONS:
+        _VERSIONS[key] = file_hash(path)
+    return _VERSIONS[key]
+
+
+def snapshot_path(path, digest):
+    """Location of the snapshot for a given source file and content hash"""
+    path = Path(path)
+    return path.parent / SNAPSHOT_DIR / f"{path.stem}-{digest[:16]}.parquet"
+
+
+def read_source(path=SOURCE_PATH):
+    """Parse the Excel workbook and coerce the mixed score columns to numbers"""
+    data = pd.read_excel(path)
+    for col in NUMERIC_COLUMNS:
+        if col not in data.columns:
+            continue
+        values = pd.to_numeric(data[col], errors="coerce")
+        # Keep whole-number scores as integers rather than floats
+        if values.dropna().mod(1).eq(0).all():
+            values = values.astype("Int64")
+        data[col] = values
+    return data
+
+
+def as_written(data):
+    """data with the whole scores of its float score columns written without ".0", as in the workbook
+
+    The scaled scores mix whole numbers with one-decimal ones, so they load as
+    floats; this is for display and CSV only, elsewhere they stay numeric.
+    """
+    columns = [col for col in NUMERIC_COLUMNS if col in data.columns and pd.api.types.is_float_dtype(data[col])]
+    if not columns:
+        return data
+    data = data.copy(deep=False)
+    for col in columns:
+        values = data[col]
+        data[col] = values.astype(str).str.removesuffix(".0").where(values.notna())
+    return data
+
+
+def build_snapshot(path=SOURCE_PATH, digest=None):
+    """Convert the workbook into a Parquet snapshot and drop stale ones"""
+    digest = digest or file_hash(path)
+    target = snapshot_path(path, digest)
+    data = read_source(path)
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_suffix(".tmp")
+    data.to_parquet(tmp, index=False)
+    os.replace(tmp, target)
+
+    for old in target.parent.glob(f"{Path(path).stem}-*.parquet"):
+        if old != target:
+            old.unlink(missing_ok=True)
+    return data
+
+
+def _sorted_categories(data, categories):
+    """Categoricals with their categories in sorted order, as astype("category") makes them"""
+    for col in categories:
+        if col in data.columns:
+            data[col] = data[col].cat.reorder_categories(sorted(data[col].cat.categories))
+    return data
+
+
+def read_snapshot(target, columns=None, academic_only=False, categories=()):
+    """Read columns of a snapshot, dropping preparatory rows before they reach pandas
+
+    Columns in categories are decoded straight into categoricals.
+    """
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    read = None if columns is None else list(columns)
+    if academic_only and read is not None and ACADEMIC_COLUMN not in read:
+        read.append(ACADEMIC_COLUMN)
+    table = pq.read_table(target, columns=read, read_dictionary=list(categories) or None)
+    if academic_only:
+        academic = table[ACADEMIC_COLUMN]
+        if hasattr(academic.type, "value_type"):
+            academic = academic.cast(academic.type.value_type)
+        table = table.filter(pc.equal(academic, ACADEMIC))
+        if columns is not None and ACADEMIC_COLUMN not in columns:
+            table = table.drop_columns([ACADEMIC_COLUMN])
+    return _sorted_categories(table.to_pandas(), categories)
+
+
+def _project(data, columns=None, academic_only=False, categories=()):
+    """The same selection as read_snapshot, on rows already in memory"""
+    if academic_only:
+        data = data[data[ACADEMIC_COLUMN] == ACADEMIC].reset_index(drop=True)
+    if columns is not None:
+        data = data[list(columns)]
+    data = data.astype({col: "category" for col in categories})
+    return _sorted_categories(data, categories)
+
+
+def read_grants(path=SOURCE_PATH, columns=None, academic_only=False, categories=()):
+    """Read the grants data from its snapshot, rebuilding it when the workbook changes
+
+    columns limits the read to those columns, academic_only keeps only students
+    of academic programs and columns in categories are read as categoricals.
+    On the snapshot all three happen before the rows become a DataFrame.
+    """
+    digest = source_version(path)
+    target = snapshot_path(path, digest)
+    if target.exists():
+        try:
+            return read_snapshot(target, columns, academic_only, categories)
+        except Exception:
+            # Unreadable or partially written snapshot, rebuild it below
+            pass
+    try:
+        data = build_snapshot(path, digest)
+    except (ImportError, OSError):
+        # No Parquet engine or read-only checkout, fall back to the workbook
+        data = read_source(path)
+    return _project(data, columns, academic_only, categories)
+
+
+def source_columns(path=SOURCE_PATH):
+    """Column names of the grants data, from the snapshot's schema when there is one"""
+    try:
+        import pyarrow.parquet as pq
+
+        return [name for name in pq.read_schema(snapshot_path(path, source_version(path))).names
+                if not name.startswith("__index_level_")]
+    except Exception:
+        return list(read_grants(path).columns)
+
+
+def compare_timings(path=SOURCE_PATH, repeat=3):
+    """Time reading the workbook against reading its snapshot"""
+    digest = file_hash(path)
+    if not snapshot_path(path, digest).exists():
+        build_snapshot(path, digest)
+
+    def best_of(func):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    excel = best_of(lambda: read_source(path))
+    snapshot = best_of(lambda: read_grants(path))
+    return {"excel_seconds": excel, "snapshot_seconds": snapshot, "speedup": excel / snapshot}
+
+
+if __name__ == "__main__":
+    timings = compare_timings()
+    print(f"read_excel:   {timings['excel_seconds'] * 1000:9.1f} ms")
+    print(f"read_parquet: {timings['snapshot_seconds'] * 1000:9.1f} ms")
+    print(f"speedup:      {timings['speedup']:9.1f}x")
@@ -0,0 +1,254 @@
+"""Per-stage timing and memory records, off unless UNIDATA_METRICS is set
+
+`UNIDATA_METRICS=on` records wall time, rows processed and the change in
+resident memory of every instrumented stage. `UNIDATA_METRICS=memory` also
+traces Python allocations, which is more precise but slows the app down.
+The allocation and memory deltas are process-wide, so stages of sessions
+running at the same time are counted in each other's deltas.
+
+Records are kept in a bounded buffer and can be exported as JSON lines or in
+the Prometheus text format.
+"""
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from itertools import count
+
+from unidata.settings import METRICS
+
+MAX_RECORDS = 5000
+
+try:
+    PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    PAGE_SIZE = None
+
+
+def resident_bytes():
+    """Resident memory of this process, None where /proc is unavailable"""
+    if PAGE_SIZE is None:
+        return None
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except OSError:
+        return None
+
+
+class _NoStage:
+    """Stand-in for a stage when recording is off"""
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NO_STAGE = _NoStage()
+
+
+class Stage:
+    """One timed stage, set rows inside the block when the count is only known there"""
+
+    def __init__(self, recorder, name, rows):
+        self.recorder = recorder
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        local = self.recorder._local
+        self.parent = getattr(local, "stage", None)
+        local.stage = self.name
+        self.rss = resident_bytes()
+        self.allocated = tracemalloc.get_traced_memory()[0] if self.recorder.memory else None
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        rss = resident_bytes()
+        local = self.recorder._local
+        local.stage = self.parent
+        self.recorder.add({
+            "time": time.time(),
+            "run": getattr(local, "run", None),
+            "stage": self.name,
+            "parent": self.parent,
+            "seconds": seconds,
+            "rows": self.rows,
+            "rss_delta": rss - self.rss if rss is not None and self.rss is not None else None,
+            "alloc_delta": tracemalloc.get_traced_memory()[0] - self.allocated if self.allocated is not None else None,
+            "error": exc_type.__name__ if exc_type else None,
+        })
+        return False
+
+
+class Recorder:
+    """Bounded, thread-safe buffer of stage records"""
+
+    def __init__(self, mode=METRICS, max_records=MAX_RECORDS):
+        self.enabled = mode != "off"
+        self.memory = mode == "memory"
+        self._records = deque(maxlen=max_records)
+        self._totals = {}
+        self._runs = count(1)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stage(self, name, rows=None):
+        """Context manager timing the block as the named stage"""
+        if not self.enabled:
+            return NO_STAGE
+        return Stage(self, name, rows)
+
+    def timed(self, name, build, rows=None):
+        """build wrapped as a stage for LRUCache.get_or_build, so only cache misses are timed
+
+        rows is the row count, or a function counting them on the result; by default
+        tables are counted and dicts count the rows of the tables they hold.
+        """
+        if not self.enabled:
+            return build
+
+        def run():
+            with self.stage(name) as stage:
+                result = build()
+                stage.rows = rows(result) if callable(rows) else rows if rows is not None else row_count(result)
+            return result
+        return run
+
+    def begin_run(self, stage="rerun"):
+        """Start a script rerun; its stages share the returned run number
+
+        stage names the record of the whole rerun, `rerun.fragment` for a
+        fragment rerun, which only runs that fragment.
+        """
+        if not self.enabled:
+            return None
+        local = self._local
+        local.run = next(self._runs)
+        local.run_start = time.perf_counter()
+        local.run_stage = stage
+        local.stage = None
+        return local.run
+
+    @property
+    def in_run(self):
+        """Whether a rerun begun on this thread has not ended yet"""
+        return getattr(self._local, "run_start", None) is not None
+
+    def end_run(self):
+        """Record the whole rerun as the stage begin_run named"""
+        local = self._local
+        if not self.enabled or not self.in_run:
+            return
+        self.add({
+            "time": time.time(), "run": local.run, "stage": local.run_stage, "parent": None,
+            "seconds": time.perf_counter() - local.run_start, "rows": None,
+            "rss_delta": None, "alloc_delta": None, "error": None,
+        })
+        local.run_start = None
+
+    def add(self, record):
+        with self._lock:
+            self._records.append(record)
+            # Totals outlive the bounded buffer, so exported counters never go down
+            s = self._totals.setdefault(record["stage"], {
+                "stage": record["stage"], "count": 0, "seconds": 0.0, "max_seconds": 0.0,
+                "rows": 0, "rss_delta": 0, "alloc_delta": 0, "errors": 0,
+            })
+            s["count"] += 1
+            s["seconds"] += record["seconds"]
+            s["max_seconds"] = max(s["max_seconds"], record["seconds"])
+            s["rows"] += record["rows"] or 0
+            s["rss_delta"] += record["rss_delta"] or 0
+            s["alloc_delta"] += record["alloc_delta"] or 0
+            s["errors"] += record["error"] is not None
+
+    def records(self, run=None):
+        """Copies of the kept records, of one rerun when run is given"""
+        with self._lock:
+            return [dict(r) for r in self._records if run is None or r["run"] == run]
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+            self._totals.clear()
+
+    def summary(self):
+        """Count, total and worst time, rows and memory per stage name since the start"""
+        with self._lock:
+            return [dict(s) for s in self._totals.values()]
+
+    def to_jsonl(self):
+        """Every kept record as one JSON object per line"""
+        return "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in self.records())
+
+    def to_prometheus(self, caches=()):
+        """Stage totals and cache counters in the Prometheus text exposition format
+
+        caches are objects with a stats() method such as unidata.cache.LRUCache.
+        """
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                rendered = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+                lines.append(f"{name}{{{rendered}}} {value}" if rendered else f"{name} {value}")
+
+        summary = self.summary()
+        metric("unidata_stage_seconds_total", "counter", "Wall time spent in each stage",
+               [({"stage": s["stage"]}, f"{s['seconds']:.6f}") for s in summary])
+        metric("unidata_stage_runs_total", "counter", "Times each stage ran",
+               [({"stage": s["stage"]}, s["count"]) for s in summary])
+        metric("unidata_stage_max_seconds", "gauge", "Slowest run of each stage",
+               [({"stage": s["stage"]}, f"{s['max_seconds']:.6f}") for s in summary])
+        metric("unidata_stage_rows_total", "counter", "Rows processed by each stage",
+               [({"stage": s["stage"]}, s["rows"]) for s in summary])
+        metric("unidata_stage_rss_delta_bytes", "gauge", "Net change in resident memory during each stage",
+               [({"stage": s["stage"]}, s["rss_delta"]) for s in summary])
+        if self.memory:
+            metric("unidata_stage_alloc_delta_bytes", "gauge", "Net Python allocations of each stage",
+                   [({"stage": s["stage"]}, s["alloc_delta"]) for s in summary])
+        metric("unidata_stage_errors_total", "counter", "Stages that raised",
+               [({"stage": s["stage"]}, s["errors"]) for s in summary])
+
+        stats = [cache.stats() for cache in caches]
+        for field, kind in (("hits", "counter"), ("misses", "counter"), ("evictions", "counter"),
+                            ("waits", "counter"), ("entries", "gauge"), ("max_entries", "gauge")):
+            suffix = "_total" if kind == "counter" else ""
+            metric(f"unidata_cache_{field}{suffix}", kind, f"LRU cache {field.replace('_', ' ')}",
+                   [({"cache": s["name"]}, s[field]) for s in stats])
+
+        rss = resident_bytes()
+        if rss is not None:
+            metric("unidata_resident_bytes", "gauge", "Resident memory of the app process", [({}, rss)])
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def row_count(value):
+    """Rows of a table or of the tables in a dict, None for anything else"""
+    if hasattr(value, "shape"):
+        return len(value)
+    if isinstance(value, dict):
+        counts = [row_count(item) for item in value.values()]
+        counts = [c for c in counts if c is not None]
+        return sum(counts) if counts else None
+    return None
+
+
+# Shared by every session of the process, like the LRU caches
+recorder = Recorder()
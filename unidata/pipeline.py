@@ -0,0 +1,212 @@
+"""Streamlit-free pipeline from the grants workbook to the dashboard tables
+
+The web app and the command line share these functions. `build_artifacts`
+writes the grant cube and the aggregated tables of a dataset version to disk so
+app processes can start from those small files instead of re-running ingest
+and aggregation.
+"""
+import json
+import os
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from unidata.aggregation import THRESHOLDS, GrantCube, base_aggregates, build_aggregates, cube_aggregates
+from unidata.compact import compact_frame
+from unidata.ingest import SOURCE_PATH, read_grants, source_version
+from unidata.translations import read_translations, translate_frame
+
+LANGUAGES = ("en", "ka")
+VIEWS = ("university", "program", "subject")
+# Base entries rolled up from the grant cube on load rather than stored
+BASE_TABLES = ("cube", "university", "program", "subject")
+
+# Columns of the grant cube the rankings are rolled up from, and the score, with their dtypes
+ANALYSIS_COLUMNS = {
+    "უსდ კოდი": "int64",
+    "უსდ": "category",
+    "პროგ. კოდი": "int64",
+    "პროგრამა": "category",
+    "არჩევითი საგანი 1": "category",
+    "არჩევითი საგანი 2": "category",
+    "გრანტი %": "float64",
+    "საკონკ. ქულა": "float64",
+}
+
+ARTIFACT_DIR = "artifacts"
+ARTIFACT_FORMAT = 5
+
+# Column name translations
+COLUMN_TRANSLATIONS = {
+    "უსდ კოდი": "University Code",
+    "უსდ": "University",
+    "პროგ. კოდი": "Program Code",
+    "პროგრამა": "Program",
+    "საშ. გრანტი %": "Avg Grant %",
+    "საშ. გრანტი % ქვედა ზღვარი": "Avg Grant % 95% CI Low",
+    "საშ. გრანტი % ზედა ზღვარი": "Avg Grant % 95% CI High",
+    "შესწ. საშ. გრანტი %": "Adjusted Avg Grant %",
+    "პროგრამების რაოდ.": "Number of Programs",
+    "სტუდ. 50%": "Students 50%",
+    "სტუდ. 70%": "Students 70%",
+    "სტუდ. 100%": "Students 100%",
+    "სულ სტუდ.": "Total Students",
+    "სტუდ. რაოდ.": "Number of Students",
+    "არჩევითი საგანი": "Optional Subject",
+    "გრანტი %": "Grant %",
+    "საგამოცდო": "Exam Subjects",
+    "ქართული ენა ნედლი ქულა": "Georgian Language Raw Score",
+    "ქართული ენა სკალ.": "Georgian Language Scale",
+    "უცხო ენა": "Foreign Language",
+    "უცხო ენა ნედლი ქულა": "Foreign Language Raw Score",
+    "უცხო ენა სკალ.": "Foreign Language Scale",
+    "არჩევითი საგანი 1": "Optional Subject 1",
+    "არჩევითი ნედლი ქულა": "Optional Raw Score",
+    "არჩევითი სკალ.": "Optional Scale",
+    "არჩევითი საგანი 2": "Optional Subject 2",
+    "არჩევითი 2 ნედლი ქულა": "Optional 2 Raw Score",
+    "არჩევითი 2 სკალ.": "Optional 2 Scale",
+    "საკონკ. ქულა": "Total Score",
+    "საშ. ქულა": "Avg Score",
+    "არჩევანი": "Choice",
+    "აკად/მოსამზად": "Academic/Preparatory",
+    "ცვლილება": "Change"
+}
+
+
+def load_rows(path=SOURCE_PATH, compact=False, columns=None):
+    """Academic program students, with missing grant percentages counted as 0
+
+    columns limits the read to those columns, None reads every column. Columns
+    listed in ANALYSIS_COLUMNS get the dtypes given there.
+    """
+    dtypes = {col: dtype for col, dtype in ANALYSIS_COLUMNS.items() if columns is None or col in columns}
+    categories = [col for col, dtype in dtypes.items() if dtype == "category"]
+    data = read_grants(path, columns, academic_only=True, categories=categories)
+    data = data.astype({col: dtype for col, dtype in dtypes.items() if dtype != "category"})
+    if "გრანტი %" in data.columns:
+        data["გრანტი %"] = data["გრანტი %"].fillna(0)
+    if compact:
+        data = compact_frame(data)
+    return data
+
+
+def load_analysis_rows(path=SOURCE_PATH, compact=False):
+    """Only the columns the rankings need, see ANALYSIS_COLUMNS"""
+    return load_rows(path, compact, list(ANALYSIS_COLUMNS))
+
+
+def apply_translations(data, lang, translations):
+    """Apply translations to the data based on selected language"""
+    if lang == "en":
+        return translate_frame(data, translations)
+    return data
+
+
+def translate_column(col):
+    """English name of a column, including year comparison columns such as 'საშ. გრანტი % 2025'"""
+    if col in COLUMN_TRANSLATIONS:
+        return COLUMN_TRANSLATIONS[col]
+    name, _, suffix = col.rpartition(" ")
+    if name in COLUMN_TRANSLATIONS:
+        return f"{COLUMN_TRANSLATIONS[name]} {COLUMN_TRANSLATIONS.get(suffix, suffix)}"
+    return col
+
+
+def translate_columns(df, lang):
+    """Translate column names based on language"""
+    if lang == "en":
+        # Only the labels change, the columns are shared with df
+        df_translated = df.copy(deep=False)
+        df_translated.columns = [translate_column(col) for col in df_translated.columns]
+        return df_translated
+    return df
+
+
+def localize(base, lang, translations, thresholds=THRESHOLDS):
+    """Ranking tables of one language from the base totals"""
+    return build_aggregates(
+        base,
+        lambda table: apply_translations(table, lang, translations),
+        thresholds
+    )
+
+
+def artifact_dir(version, root=ARTIFACT_DIR):
+    """Directory holding the artifacts of a dataset version"""
+    return Path(root) / version[:16]
+
+
+def build_artifacts(path=SOURCE_PATH, root=ARTIFACT_DIR, thresholds=THRESHOLDS, translations_dir="."):
+    """Write the grant cube and every language's tables of the current dataset version to disk"""
+    version = source_version(path)
+    translations = read_translations(translations_dir)
+    base = base_aggregates(load_analysis_rows(path))
+
+    target = artifact_dir(version, root)
+    target.mkdir(parents=True, exist_ok=True)
+    base["cube"].cells.to_parquet(target / "base_cube.parquet", index=False)
+
+    overviews = {}
+    for lang in LANGUAGES:
+        aggregates = localize(base, lang, translations, thresholds)
+        for view in VIEWS:
+            aggregates[view].to_parquet(target / f"{view}_{lang}.parquet")
+        overviews[lang] = aggregates["overview"]
+
+    manifest = {
+        "format": ARTIFACT_FORMAT,
+        "version": version,
+        "source": os.fspath(path),
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "thresholds": thresholds,
+        "base": {key: value for key, value in base.items() if key not in BASE_TABLES},
+        "overview": overviews,
+    }
+    # The manifest is written last, so a directory without one is an interrupted build
+    with open(target / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, default=float)
+    return target
+
+
+def read_manifest(version, root=ARTIFACT_DIR):
+    """The manifest of a version's artifacts, None when they were never built"""
+    try:
+        with open(artifact_dir(version, root) / "manifest.json", "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def is_current(manifest, version, thresholds=THRESHOLDS):
+    """Whether a manifest describes artifacts of this version, format and thresholds"""
+    return (
+        manifest is not None
+        and manifest.get("format") == ARTIFACT_FORMAT
+        and manifest.get("version") == version
+        and manifest.get("thresholds") == thresholds
+    )
+
+
+def load_artifacts(version, thresholds=THRESHOLDS, root=ARTIFACT_DIR):
+    """Base totals, rolled up from the stored cube, and per-language tables from disk
+
+    None when they are missing or were built differently.
+    """
+    manifest = read_manifest(version, root)
+    if not is_current(manifest, version, thresholds):
+        return None
+
+    target = artifact_dir(version, root)
+    try:
+        base = cube_aggregates(GrantCube(pd.read_parquet(target / "base_cube.parquet")))
+        base.update(manifest["base"])
+        artifacts = {"base": base}
+        for lang in LANGUAGES:
+            aggregates = {view: pd.read_parquet(target / f"{view}_{lang}.parquet") for view in VIEWS}
+            aggregates["overview"] = manifest["overview"][lang]
+            artifacts[lang] = aggregates
+    except (ImportError, OSError):
+        return None
+    return artifacts
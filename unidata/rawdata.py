@@ -0,0 +1,101 @@
+"""Sorted, paged access to the raw student rows"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+PAGE_SIZES = [50, 100, 500, 1000]
+
+
+def sort_order(column, ascending=True):
+    """Row positions that sort column, with missing values last as sort_values puts them"""
+    codes, _ = pd.factorize(column, sort=True)
+    codes = codes.astype(np.int64)
+    keys = codes if ascending else -codes
+    keys = np.where(codes < 0, np.iinfo(np.int64).max, keys)
+    return np.argsort(keys, kind="stable")
+
+
+class RowBrowser:
+    """Serves windows of rows in any column's sort order
+
+    The sort permutation of each column is computed on first use and kept, so
+    changing the sort column, order or selected columns is an index lookup and
+    a slice of at most one page of rows.
+
+    data may hold only some of the columns. columns then lists every column
+    that can be shown, and load_columns(names) returns the missing ones for the
+    same rows in the same order; each is loaded the first time it is used.
+    """
+
+    def __init__(self, data, columns=None, load_columns=None):
+        self.data = data
+        self.columns = list(data.columns) if columns is None else list(columns)
+        self._load_columns = load_columns
+        self._orders = {}
+        self._codes = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.data)
+
+    def require(self, columns):
+        """Load the columns that are not held yet, once"""
+        with self._lock:
+            missing = [col for col in columns if col not in self.data.columns]
+            if missing:
+                extra = self._load_columns(missing)
+                extra.index = self.data.index
+                # A new frame, the shared one may be read-only
+                self.data = pd.concat([self.data, extra[missing]], axis=1)
+
+    def order(self, column, ascending=True):
+        """Cached sort permutation for a column and direction"""
+        key = (column, ascending)
+        with self._lock:
+            if key not in self._orders:
+                self.require([column])
+                self._orders[key] = sort_order(self.data[column], ascending)
+            return self._orders[key]
+
+    def codes(self, columns):
+        """Cached factor codes of the value combinations in columns, with the combinations"""
+        key = tuple(columns)
+        with self._lock:
+            if key not in self._codes:
+                self.require(key)
+                if len(key) == 1:
+                    codes, uniques = pd.factorize(self.data[key[0]])
+                else:
+                    codes, uniques = pd.MultiIndex.from_frame(self.data[list(key)]).factorize()
+                self._codes[key] = (codes, list(uniques))
+            return self._codes[key]
+
+    def match(self, columns, keys):
+        """Boolean row mask of rows whose values in columns are among keys"""
+        codes, uniques = self.codes(columns)
+        keys = set(keys)
+        wanted = [i for i, value in enumerate(uniques) if value in keys]
+        return np.isin(codes, wanted)
+
+    def positions(self, sort_by=None, ascending=True, mask=None):
+        """Row positions in display order, optionally restricted to a row mask"""
+        if sort_by is None:
+            order = np.arange(len(self.data))
+        else:
+            order = self.order(sort_by, ascending)
+        if mask is not None:
+            order = order[mask[order]]
+        return order
+
+    def page(self, columns, sort_by=None, ascending=True, offset=0, limit=PAGE_SIZES[0], mask=None):
+        """Rows offset..offset+limit of the selected columns in sort order"""
+        window = self.positions(sort_by, ascending, mask)[offset:offset + limit]
+        self.require(columns)
+        return self.data.take(window)[columns]
+
+    def rows(self, columns, sort_by=None, ascending=True, mask=None):
+        """Every row of the selected columns in sort order"""
+        order = self.positions(sort_by, ascending, mask)
+        self.require(columns)
+        return self.data[columns].take(order)
@@ -0,0 +1,149 @@
+"""Bilingual, typo-tolerant search over university, program and subject names"""
+import re
+
+import numpy as np
+import pandas as pd
+
+# Georgian letters in Latin script, following the national romanization without apostrophes
+GEORGIAN_TO_LATIN = {
+    "ა": "a", "ბ": "b", "გ": "g", "დ": "d", "ე": "e", "ვ": "v", "ზ": "z", "თ": "t",
+    "ი": "i", "კ": "k", "ლ": "l", "მ": "m", "ნ": "n", "ო": "o", "პ": "p", "ჟ": "zh",
+    "რ": "r", "ს": "s", "ტ": "t", "უ": "u", "ფ": "p", "ქ": "k", "ღ": "gh", "ყ": "q",
+    "შ": "sh", "ჩ": "ch", "ც": "ts", "ძ": "dz", "წ": "ts", "ჭ": "ch", "ხ": "kh", "ჯ": "j",
+    "ჰ": "h",
+}
+_TRANSLITERATION = str.maketrans(GEORGIAN_TO_LATIN)
+_SEPARATORS = re.compile(r"[\W_]+")
+
+# Share of the query's trigrams a name must contain to count as a fuzzy match
+MIN_SIMILARITY = 0.6
+# Shorter queries only match as substrings, fuzzy matches on them are mostly noise
+FUZZY_MIN_LENGTH = 4
+
+
+def normalize(text):
+    """Case-folded text with punctuation collapsed to single spaces"""
+    return _SEPARATORS.sub(" ", str(text).casefold()).strip()
+
+
+def transliterate(text):
+    """Georgian script rendered in Latin letters"""
+    return str(text).translate(_TRANSLITERATION)
+
+
+def trigrams(text):
+    """Distinct character trigrams of normalized text, padded so word starts count"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """Trigram index over the names of a set of documents
+
+    Each document has one or more names (Georgian, English, transliterated);
+    a query matches a document when it is a substring of any of its names or
+    shares enough trigrams with one of them to tolerate typos.
+    """
+
+    def __init__(self, documents):
+        self.keys = []
+        self.names = []
+        owners = []
+        postings = {}
+        for key, names in documents.items():
+            doc = len(self.keys)
+            self.keys.append(key)
+            for name in dict.fromkeys(normalize(name) for name in names if pd.notna(name)):
+                if not name:
+                    continue
+                alias = len(self.names)
+                self.names.append(name)
+                owners.append(doc)
+                for gram in trigrams(name):
+                    postings.setdefault(gram, []).append(alias)
+        self._owners = np.asarray(owners, dtype=np.int64)
+        self._postings = {gram: np.asarray(aliases, dtype=np.int64) for gram, aliases in postings.items()}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def search(self, query, limit=None):
+        """Document keys matching query, best match first"""
+        query = normalize(query)
+        if not query:
+            return []
+
+        if len(query) < 3:
+            # Too short for trigrams, plain substring scan over the names
+            candidates = [alias for alias, name in enumerate(self.names) if query in name]
+            similarity = dict.fromkeys(candidates, 1.0)
+        else:
+            grams = trigrams(query)
+            hits = [self._postings[gram] for gram in grams if gram in self._postings]
+            if not hits:
+                return []
+            counts = np.bincount(np.concatenate(hits), minlength=len(self.names))
+            candidates = np.flatnonzero(counts >= MIN_SIMILARITY * len(grams))
+            similarity = dict(zip(candidates.tolist(), (counts[candidates] / len(grams)).tolist()))
+
+        best = {}
+        for alias, score in similarity.items():
+            name = self.names[alias]
+            # Whole substrings beat fuzzy matches, and prefixes beat other substrings
+            if name.startswith(query):
+                score += 2
+            elif query in name:
+                score += 1
+            elif len(query) < FUZZY_MIN_LENGTH:
+                continue
+            doc = self._owners[alias]
+            rank = (score, -len(name))
+            if doc not in best or rank > best[doc]:
+                best[doc] = rank
+
+        ranked = sorted(best, key=best.get, reverse=True)
+        return [self.keys[doc] for doc in ranked[:limit]]
+
+
+def name_variants(*names):
+    """The given names plus Latin transliterations of any Georgian ones"""
+    variants = [name for name in names if pd.notna(name)]
+    return variants + [transliterate(name) for name in variants if transliterate(name) != name]
+
+
+def _documents(original, translated, keys, name_columns):
+    """Documents keyed by the displayed labels, named in both languages"""
+    shown_keys = zip(*(translated[col] for col in keys))
+    name_pairs = zip(*(original[col] for col in name_columns), *(translated[col] for col in name_columns))
+    documents = {}
+    for key, names in zip(shown_keys, name_pairs):
+        key = key[0] if len(key) == 1 else key
+        documents.setdefault(key, []).extend(name_variants(*names))
+    return documents
+
+
+def select_ranked(table, columns, keys):
+    """Rows of table whose values in columns are among keys, in the order of keys"""
+    rank = {key: i for i, key in enumerate(keys)}
+    values = table[columns[0]] if len(columns) == 1 else zip(*(table[col] for col in columns))
+    order = pd.Series([rank.get(value, np.nan) for value in values], dtype="float64")
+    return table.iloc[order.dropna().sort_values(kind="stable").index]
+
+
+def build_search_indexes(base, relabel=None):
+    """University, program and subject indexes keyed by the labels shown for one language
+
+    base is the output of aggregation.base_aggregates and relabel the same
+    translating function build_aggregates receives.
+    """
+    relabel = relabel or (lambda table: table)
+    indexes = {}
+    for view, keys, names in [
+        ("university", ["უსდ"], ["უსდ"]),
+        ("program", ["უსდ", "პროგრამა"], ["პროგრამა"]),
+        ("subject", ["არჩევითი საგანი 1"], ["არჩევითი საგანი 1"]),
+    ]:
+        original = base[view].reset_index(drop=True)
+        translated = relabel(original)
+        indexes[view] = SearchIndex(_documents(original, translated, keys, names))
+    return indexes
@@ -0,0 +1,32 @@
+"""Runtime switches, read from UNIDATA_* environment variables"""
+import os
+
+
+def flag(name, default=False):
+    """Boolean switch such as UNIDATA_COMPACT=1"""
+    value = os.environ.get(f"UNIDATA_{name}")
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def option(name, default, choices):
+    """String switch restricted to choices, falling back to default"""
+    value = os.environ.get(f"UNIDATA_{name}", default).strip().lower()
+    return value if value in choices else default
+
+
+# Store repeated text as categoricals and scores in the narrowest numeric dtypes
+COMPACT = flag("COMPACT")
+
+# "tabs" renders every view on each rerun, "lazy" only runs the selected one
+VIEW_MODE = option("VIEW_MODE", "tabs", ("tabs", "lazy"))
+
+# "on" records time, rows and memory of each stage, "memory" also traces allocations
+METRICS = option("METRICS", "off", ("off", "on", "memory"))
+
+# Show the operator panel to every visitor; otherwise it needs ?operator=1 with metrics on
+OPERATOR = flag("OPERATOR")
+
+# Hold the student rows once per process, read-only, instead of a copy per caller
+SHARED = flag("SHARED")
@@ -0,0 +1,66 @@
+"""Read-only data shared by every session of a process
+
+With UNIDATA_SHARED=1 the app keeps a single copy of the student rows per
+process instead of one copy per caller. The rows are frozen so that an
+accidental in-place write from any session raises instead of silently
+changing what every other session sees. The translation table is held once
+per process in either mode, see unidata.translations. Sessions derive narrow
+projections and relabelled views from them, which share the untouched columns.
+"""
+import numpy as np
+import pandas as pd
+
+
+def _buffers(values):
+    """numpy buffers behind a column's values, down to the arrays that own the memory"""
+    if hasattr(values, "_mask"):
+        # Nullable integer, float and boolean columns keep their values and mask apart
+        arrays = [values._data, values._mask]
+    elif isinstance(values, pd.Categorical):
+        arrays = [values.codes]
+    else:
+        arrays = [values] if isinstance(values, np.ndarray) else []
+    for array in arrays:
+        while isinstance(array, np.ndarray):
+            yield array
+            array = array.base
+
+
+def freeze_frame(data):
+    """Mark every buffer of data read-only in place and return it
+
+    Column assignment on a shallow copy still works, since it replaces a column
+    of the copy without writing into the shared buffers. Arrow-backed columns
+    are immutable already.
+    """
+    for block in data._mgr.blocks:
+        for array in _buffers(block.values):
+            array.flags.writeable = False
+    return data
+
+
+def is_frozen(data):
+    """Whether no numpy buffer of data can be written to"""
+    return all(not array.flags.writeable for block in data._mgr.blocks for array in _buffers(block.values))
+
+
+if __name__ == "__main__":
+    import time
+
+    from unidata.pipeline import apply_translations, load_rows
+    from unidata.translations import read_translations
+    from unidata.metrics import resident_bytes
+
+    translations = read_translations()
+    rows = freeze_frame(load_rows())
+    start = time.perf_counter()
+    english = apply_translations(rows, "en", translations)
+    elapsed = time.perf_counter() - start
+    shared = [col for col in rows.columns if np.shares_memory(np.asarray(rows[col]), np.asarray(english[col]))]
+    print(f"translated in {elapsed * 1000:.1f} ms, {len(shared)} of {len(rows.columns)} columns shared with the Georgian rows")
+    try:
+        rows.loc[rows.index[0], "გრანტი %"] = 0
+        print("in-place write was not caught")
+    except ValueError as error:
+        print(f"in-place write raised: {error}")
+    print(f"resident memory {resident_bytes() / 2 ** 20:.0f} MB")
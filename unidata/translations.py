@@ -0,0 +1,274 @@
+"""English labels for universities, programs and optional subjects
+
+The JSON translation files key programs by '<university name> _<program code>'
+strings. They are compiled into Arrow tables keyed by the university and
+program code integers, next to the grants snapshots, and read only when an
+English table is first translated.
+"""
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SUBJECT_TRANSLATIONS = {
+    "ფიზიკა": "Physics",
+    "ქიმია": "Chemistry",
+    "ხელოვნება": "Art",
+    "მათემატიკა": "Mathematics",
+    "გეოგრაფია": "Geography",
+    "ლიტერატურა": "Literature",
+    "სამოქალაქო განათლება": "Civic Education",
+    "ისტორია": "History",
+    "ბიოლოგია": "Biology"
+}
+
+SUBJECT_COLUMNS = ["არჩევითი საგანი 1", "არჩევითი საგანი 2"]
+
+
+UNIVERSITIES_FILE = "universities.json"
+PROGRAMS_FILE = "programs.json"
+
+
+def read_translation_files(directory="."):
+    """Read universities.json and programs.json, empty dicts when they are missing"""
+    directory = Path(directory)
+    try:
+        with open(directory / UNIVERSITIES_FILE, "r", encoding="utf-8") as f:
+            universities_trans = json.load(f)
+        with open(directory / PROGRAMS_FILE, "r", encoding="utf-8") as f:
+            programs_trans = json.load(f)
+        return universities_trans, programs_trans
+    except FileNotFoundError:
+        return {}, {}
+
+
+def compile_translations(directory="."):
+    """Universities and programs of the JSON files as tables keyed by their codes
+
+    Programs name their university by its Georgian name, which is resolved to
+    the code universities.json gives it; -1 when it is not listed there.
+    """
+    universities_trans, programs_trans = read_translation_files(directory)
+    universities = pd.DataFrame({
+        "university_code": pd.array([entry.get("code") for entry in universities_trans.values()], dtype="Int64"),
+        "university": list(universities_trans),
+        "english": [entry.get("english") for entry in universities_trans.values()],
+    })
+    codes = {name.strip(): entry.get("code") for name, entry in universities_trans.items()}
+    programs = pd.DataFrame({
+        "university_code": np.array([codes.get(entry["university"].strip(), -1) for entry in programs_trans.values()],
+                                    dtype=np.int64),
+        "program_code": np.array([entry["program_code"] for entry in programs_trans.values()], dtype=np.int64),
+        "university": [entry["university"] for entry in programs_trans.values()],
+        "georgian": [entry.get("georgian") for entry in programs_trans.values()],
+        "english": [entry.get("english") for entry in programs_trans.values()],
+    })
+    programs = programs.sort_values(["university_code", "program_code"], ignore_index=True)
+    return universities, programs
+
+
+def translations_version(directory="."):
+    """Hash of both translation files, None when either is missing"""
+    from unidata.ingest import source_version
+
+    directory = Path(directory)
+    try:
+        versions = [source_version(directory / name) for name in (UNIVERSITIES_FILE, PROGRAMS_FILE)]
+    except FileNotFoundError:
+        return None
+    return hashlib.sha256("".join(versions).encode()).hexdigest()
+
+
+def compiled_paths(directory, digest):
+    """Locations of the compiled university and program tables of one version of the files"""
+    from unidata.ingest import SNAPSHOT_DIR
+
+    root = Path(directory) / SNAPSHOT_DIR
+    return root / f"universities-{digest[:16]}.arrow", root / f"programs-{digest[:16]}.arrow"
+
+
+def write_translations(directory="."):
+    """Compile the JSON files to Arrow IPC files and drop tables of older versions; returns the tables"""
+    digest = translations_version(directory)
+    tables = compile_translations(directory)
+    if digest is None:
+        return tables
+    for table, target in zip(tables, compiled_paths(directory, digest)):
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_suffix(".tmp")
+        table.to_feather(tmp, compression="zstd")
+        os.replace(tmp, target)
+        kind = target.name.split("-")[0]
+        for old in target.parent.glob(f"{kind}-*.arrow"):
+            if old != target:
+                old.unlink(missing_ok=True)
+    return tables
+
+
+class TranslationTable:
+    """English university and program names of one translation directory, loaded on first lookup
+
+    Georgian sessions never look anything up, so they never read the tables.
+    """
+
+    def __init__(self, directory="."):
+        self.directory = Path(directory)
+        self._tables = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._tables is None:
+                self._tables = self._read()
+            return self._tables
+
+    def _read(self):
+        digest = translations_version(self.directory)
+        if digest is None:
+            universities, programs = compile_translations(self.directory)
+        else:
+            try:
+                universities, programs = (pd.read_feather(path) for path in compiled_paths(self.directory, digest))
+            except Exception:
+                # Not compiled yet, unreadable or no pyarrow: compile from the JSON files
+                try:
+                    universities, programs = write_translations(self.directory)
+                except (ImportError, OSError):
+                    universities, programs = compile_translations(self.directory)
+        return {
+            "universities": universities,
+            "programs": programs,
+            "university_names": {name: english for name, english in zip(universities["university"], universities["english"])
+                                 if isinstance(english, str)},
+            # Compiled programs are sorted by code, so their keys are too
+            "program_keys": program_keys(programs["university_code"], programs["program_code"]),
+            "program_names": np.append(programs["english"].to_numpy(dtype=object), None),
+        }
+
+    @property
+    def universities(self):
+        return self._load()["universities"]
+
+    @property
+    def programs(self):
+        return self._load()["programs"]
+
+    @property
+    def university_names(self):
+        """English names by Georgian university name"""
+        return self._load()["university_names"]
+
+    def program_names(self, university_codes, program_codes):
+        """English names of the (university code, program code) pairs, None where there is none"""
+        tables = self._load()
+        keys, wanted = tables["program_keys"], program_keys(university_codes, program_codes)
+        positions = np.searchsorted(keys, wanted)
+        found = (positions < len(keys)) & (wanted >= 0)
+        found[found] = keys[positions[found]] == wanted[found]
+        # Pairs without a program pick the trailing None
+        return tables["program_names"][np.where(found, positions, -1)]
+
+    def __bool__(self):
+        return len(self.programs) > 0 or len(self.universities) > 0
+
+
+def untranslated(data, translations):
+    """Programs of student rows without an English name, with their student counts"""
+    keys = ["უსდ კოდი", "უსდ", "პროგ. კოდი", "პროგრამა"]
+    programs = data.groupby(keys, observed=True, dropna=False).size().rename("students").reset_index()
+    english = translations.program_names(programs["უსდ კოდი"], programs["პროგ. კოდი"]) if translations else None
+    missing = pd.isna(english) if english is not None else np.ones(len(programs), dtype=bool)
+    return programs[missing].sort_values("students", ascending=False, ignore_index=True)
+
+
+def read_translations(directory="."):
+    """The translation table of a directory, nothing is read until the first lookup"""
+    return TranslationTable(directory)
+
+
+# Bits of a program key holding the program code. Codes run to 11 digits, about 2**34,
+# and university codes to a few hundred, so both fit one int64 with room to spare
+PROGRAM_CODE_BITS = 40
+
+
+def program_keys(university_codes, program_codes):
+    """One int64 per (university code, program code) pair, -1 for codes out of range"""
+    university_codes = np.asarray(university_codes, dtype=np.int64)
+    program_codes = np.asarray(program_codes, dtype=np.int64)
+    keys = (university_codes << PROGRAM_CODE_BITS) + program_codes
+    valid = (program_codes >= 0) & (program_codes < 1 << PROGRAM_CODE_BITS) & (university_codes >= 0)
+    return np.where(valid, keys, -1)
+
+
+def _take(labels, codes, original):
+    """Expand per-category labels back to rows, keeping the original value where there is no label"""
+    # Code -1 (missing key) picks the trailing None and falls back to the original value
+    labels = np.append(np.asarray(labels, dtype=object), None)
+    values = labels[codes]
+    missing = pd.isna(labels)[codes]
+    values[missing] = np.asarray(original, dtype=object)[missing]
+    return values
+
+
+def _relabel_categorical(series, mapping):
+    """Rename categories through mapping, merging ones that end up with the same label"""
+    labels = [mapping.get(value, value) for value in series.cat.categories]
+    # Sorted categories keep sort_values alphabetical in the new language
+    remap, categories = pd.factorize(np.asarray(labels, dtype=object), sort=True)
+    codes = series.cat.codes.to_numpy()
+    codes = np.where(codes < 0, -1, remap[codes])
+    values = pd.Categorical.from_codes(codes, categories=categories)
+    return pd.Series(values, index=series.index, name=series.name)
+
+
+def relabel(series, mapping):
+    """Replace values found in mapping, looking each distinct value up only once"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return _relabel_categorical(series, mapping)
+    codes, uniques = pd.factorize(series)
+    labels = [mapping.get(value) for value in uniques]
+    return pd.Series(_take(labels, codes, series), index=series.index, name=series.name)
+
+
+def translate_programs(data, translations):
+    """English program names looked up by university and program code"""
+    uni_codes, unis = pd.factorize(data["უსდ კოდი"])
+    prog_codes, progs = pd.factorize(data["პროგ. კოდი"])
+    # Combine both factor codes into one integer per pair, missing halves stay -1
+    pair_keys = np.where((uni_codes < 0) | (prog_codes < 0), -1, uni_codes * len(progs) + prog_codes)
+    codes, pairs = pd.factorize(pair_keys, use_na_sentinel=False)
+
+    found = pairs >= 0
+    labels = np.full(len(pairs), None, dtype=object)
+    labels[found] = translations.program_names(np.asarray(unis)[pairs[found] // len(progs)],
+                                               np.asarray(progs)[pairs[found] % len(progs)])
+    values = _take(labels, codes, data["პროგრამა"])
+    if isinstance(data["პროგრამა"].dtype, pd.CategoricalDtype):
+        values = pd.Categorical(values)
+    return pd.Series(values, index=data.index, name="პროგრამა")
+
+
+def translate_frame(data, translations):
+    """Return data with English university, program and subject names
+
+    Works on student rows as well as on aggregated tables that carry any of the
+    name columns. Only the name columns are replaced, the others are shared
+    with data, which is left unchanged.
+    """
+    data_translated = data.copy(deep=False)
+
+    if {"უსდ კოდი", "პროგ. კოდი", "პროგრამა"} <= set(data.columns) and translations:
+        data_translated["პროგრამა"] = translate_programs(data, translations)
+
+    for col in SUBJECT_COLUMNS:
+        if col in data_translated.columns:
+            data_translated[col] = relabel(data_translated[col], SUBJECT_TRANSLATIONS)
+
+    if "უსდ" in data_translated.columns and translations:
+        data_translated["უსდ"] = relabel(data_translated["უსდ"], translations.university_names)
+
+    return data_translated
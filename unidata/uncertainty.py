@@ -0,0 +1,146 @@
+"""Bootstrap confidence intervals and empirical-Bayes shrinkage of group mean grants
+
+Grant percentages only take a handful of values (0, 50, 70 and 100), so a
+group is described completely by how many of its students got each value.
+Resampling a group's students with replacement is then one multinomial draw
+over those values with the group's shares as probabilities, and the draws of
+every group and replicate are made in one batched call. Groups with the same
+counts share their draws, and groups whose students all got the same grant
+have no spread to resample.
+
+Intervals are also kept by counts for the whole process, so the rankings of
+the second language, and most groups of a filtered ranking, only draw the
+groups not seen yet. A group's interval therefore depends, within resampling
+noise, on the groups it was first drawn with.
+"""
+import time
+
+import numpy as np
+
+from unidata.cache import LRUCache
+
+REPLICATES = 2000
+CONFIDENCE = 0.95
+# Fixed, so the same groups drawn together give the same intervals in every process
+SEED = 0
+# Counts drawn per batch, groups x replicates x values, bounding the memory of one batch
+BATCH_CELLS = 2_000_000
+
+# Intervals drawn so far, by group counts and values; a few hundred bytes each
+INTERVALS = LRUCache(max_entries=50_000, name="intervals")
+
+
+def bootstrap_means(counts, values, replicates=REPLICATES, seed=SEED):
+    """Means of bootstrap resamples of every group, shape (replicates, groups)
+
+    counts[g, k] is the number of students of group g that got values[g, k];
+    values may also be one row shared by all groups.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    values = np.broadcast_to(np.asarray(values, dtype=float), counts.shape)
+    means = np.empty((replicates, len(counts)))
+    if not len(counts):
+        return means
+
+    # Draw each distinct group once, and only those with more than one value
+    table = np.concatenate([counts, values], axis=1)
+    distinct, inverse = np.unique(table, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    groups, group_values = distinct[:, :counts.shape[1]].astype(np.int64), distinct[:, counts.shape[1]:]
+    sizes = groups.sum(axis=1)
+    spread = (groups > 0).sum(axis=1) > 1
+
+    distinct_means = np.empty((replicates, len(groups)))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        distinct_means[:] = (groups * group_values).sum(axis=1) / sizes
+    if spread.any():
+        rng = np.random.default_rng(seed)
+        sampled, sampled_values = groups[spread], group_values[spread]
+        shares = sampled / sizes[spread, None]
+        step = max(1, BATCH_CELLS // sampled.size)
+        for start in range(0, replicates, step):
+            stop = min(start + step, replicates)
+            draws = rng.multinomial(sizes[spread], shares, size=(stop - start, len(sampled)))
+            distinct_means[start:stop, spread] = (draws * sampled_values).sum(axis=2) / sizes[spread]
+    means[:] = distinct_means[:, inverse]
+    return means
+
+
+def bootstrap_interval(counts, values, confidence=CONFIDENCE, replicates=REPLICATES, seed=SEED):
+    """Percentile bootstrap interval of every group's mean, as (low, high) arrays
+
+    Groups already in INTERVALS are looked up, and all the others are drawn
+    together in one bootstrap_means batch, then kept.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    values = np.broadcast_to(np.asarray(values, dtype=float), counts.shape)
+    if not len(counts):
+        return np.empty(0), np.empty(0)
+    width = counts.shape[1]
+    distinct, inverse = np.unique(np.concatenate([counts, values], axis=1), axis=0, return_inverse=True)
+    keys = [(row.tobytes(), confidence, replicates, seed) for row in distinct]
+
+    bounds = np.empty((len(distinct), 2))
+    missing = []
+    for position, key in enumerate(keys):
+        interval = INTERVALS.get(key)
+        if interval is None:
+            missing.append(position)
+        else:
+            bounds[position] = interval
+    if missing:
+        tail = (1 - confidence) / 2
+        means = bootstrap_means(distinct[missing, :width], distinct[missing, width:], replicates, seed)
+        bounds[missing] = np.quantile(means, [tail, 1 - tail], axis=0).T
+        for position in missing:
+            INTERVALS.get_or_build(keys[position], bounds[position].copy)
+    bounds = bounds[inverse.reshape(-1)]
+    return bounds[:, 0], bounds[:, 1]
+
+
+def shrunk_means(counts, values):
+    """Empirical-Bayes estimates of every group's mean, pulled toward the mean of all students
+
+    The group means are treated as noisy measurements of true means spread
+    around the overall mean. How much each one moves depends on its sampling
+    variance, the pooled variance within groups over its size, against the
+    spread of the true means, estimated from the observed spread minus the
+    part sampling noise explains. Small groups move the most, and all of them
+    collapse to the overall mean when the groups differ no more than noise.
+    Returns the estimates and each group's own weight, 1 meaning unchanged.
+    """
+    counts = np.asarray(counts, dtype=float)
+    values = np.broadcast_to(np.asarray(values, dtype=float), counts.shape)
+    sizes = counts.sum(axis=1)
+    if not len(counts) or sizes.sum() == 0:
+        return np.full(len(counts), np.nan), np.zeros(len(counts))
+    totals = (counts * values).sum(axis=1)
+    means = totals / sizes
+    prior = totals.sum() / sizes.sum()
+
+    within = (counts * (values - means[:, None]) ** 2).sum() / max(sizes.sum() - len(sizes), 1)
+    sampling = within / sizes
+    between = max(np.mean((means - prior) ** 2) - np.mean(sampling), 0.0)
+    weights = between / (between + sampling) if between > 0 else np.zeros(len(sizes))
+    return prior + weights * (means - prior), weights
+
+
+if __name__ == "__main__":
+    from unidata.aggregation import base_aggregates, consolidate, level_values
+    from unidata.pipeline import load_analysis_rows
+
+    base = base_aggregates(load_analysis_rows())
+    for view, keys in (("university", ["უსდ კოდი", "უსდ"]), ("program", ["უსდ", "პროგრამა"]),
+                       ("subject", ["არჩევითი საგანი 1"])):
+        counts, values = level_values(consolidate(base[view], keys))
+        start = time.perf_counter()
+        low, high = bootstrap_interval(counts, values)
+        drawn = time.perf_counter() - start
+        # The same groups again, as the other language or a filter that keeps them asks for them
+        start = time.perf_counter()
+        bootstrap_interval(counts, values)
+        kept = time.perf_counter() - start
+        shrunk, weights = shrunk_means(counts, values)
+        print(f"{view:<10} {len(counts):>5} groups, {REPLICATES} replicates in {drawn * 1000:6.1f} ms, "
+              f"again {kept * 1000:5.1f} ms, median interval width {np.median(high - low):5.1f} points, "
+              f"median weight {np.median(weights):.2f}")
@@ -0,0 +1,270 @@
+"""Warm-up of a freshly started app server, so the first visitor does not take the cold path
+
+Streamlit only runs the script once a browser session connects, so the warm-up
+connects a session itself, over the websocket protocol the browser uses, and
+runs the app in every language. That fills the process-wide caches exactly as
+a visitor would: snapshot, translations, aggregates, search indexes, figures
+and the raw row browser. Visitors arriving meanwhile wait on the builds in
+flight rather than starting their own, see unidata.cache.
+
+`python -m unidata serve` starts the server, warms it and reports readiness
+over HTTP and as a file for health checks.
+"""
+import asyncio
+import json
+import logging
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from unidata.pipeline import LANGUAGES
+
+logger = logging.getLogger(__name__)
+
+SCRIPT = "main.py"
+LANGUAGE_LABEL = "🌐 Language / ენა:"
+LANGUAGE_OPTIONS = {"en": "English", "ka": "ქართული"}
+# Key of the view selector shown with UNIDATA_VIEW_MODE=lazy
+VIEW_KEY = "active_view"
+
+
+class ScriptClient:
+    """One app session driven over the websocket, keeping widget values like the browser does"""
+
+    def __init__(self, port, host="127.0.0.1"):
+        self.port = port
+        self.host = host
+        self.socket = None
+        self.widgets = {}
+        self.values = {}
+        self.downloads = []
+        # Seconds from sending the last rerun to its first rendered element
+        self.first_element = None
+
+    async def connect(self):
+        from tornado.websocket import websocket_connect
+
+        self.socket = await websocket_connect(f"ws://{self.host}:{self.port}/_stcore/stream",
+                                              subprotocols=["streamlit"])
+
+    async def rerun(self, **changes):
+        """Send the widget values plus changes, wait for the script to finish
+
+        Returns the seconds the rerun took and the exception messages it showed.
+        """
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        message = BackMsg()
+        message.rerun_script.query_string = ""
+        states = message.rerun_script.widget_states.widgets
+        for widget_id, (field, value) in {**self.values, **changes}.items():
+            state = states.add()
+            state.id = widget_id
+            if field == "string_array_value":
+                state.string_array_value.data.extend(value)
+            else:
+                setattr(state, field, value)
+        # Buttons only fire for the rerun they were clicked in
+        self.values.update({key: value for key, value in changes.items() if value[0] != "trigger_value"})
+
+        start = time.perf_counter()
+        await self.socket.write_message(message.SerializeToString(), binary=True)
+        widgets, downloads, errors = {}, [], []
+        self.first_element = None
+        while True:
+            raw = await self.socket.read_message()
+            if raw is None:
+                raise ConnectionError("server closed the websocket")
+            forward = ForwardMsg()
+            forward.ParseFromString(raw)
+            kind = forward.WhichOneof("type")
+            if kind == "script_finished":
+                break
+            if kind != "delta" or forward.delta.WhichOneof("type") != "new_element":
+                continue
+            if self.first_element is None:
+                self.first_element = time.perf_counter() - start
+            element = forward.delta.new_element
+            element_type = element.WhichOneof("type")
+            proto = getattr(element, element_type)
+            if element_type == "exception":
+                errors.append(proto.message)
+            elif element_type == "download_button":
+                downloads.append(proto.url)
+            elif getattr(proto, "id", "") and hasattr(proto, "label"):
+                widgets.setdefault((element_type, proto.label), proto)
+        seconds = time.perf_counter() - start
+
+        self.widgets, self.downloads = widgets, downloads
+        # Widgets that are no longer on the page do not send values any more
+        live = {proto.id for proto in widgets.values()}
+        self.values = {key: value for key, value in self.values.items() if key in live}
+        return seconds, errors
+
+    def widget(self, element_type, label):
+        return self.widgets[(element_type, label)]
+
+    def keyed(self, element_type, key):
+        """Widget created with key=, whose id ends with that key"""
+        for (kind, _), proto in self.widgets.items():
+            if kind == element_type and proto.id.endswith(key):
+                return proto
+        return None
+
+    async def set_language(self, lang):
+        selector = self.widget("selectbox", LANGUAGE_LABEL)
+        return await self.rerun(**{selector.id: ("string_value", LANGUAGE_OPTIONS[lang])})
+
+    def close(self):
+        if self.socket is not None:
+            self.socket.close()
+
+
+async def warm_up(port, languages=LANGUAGES, host="127.0.0.1"):
+    """Run the app once per language, and per view in lazy view mode; returns (step, seconds) pairs"""
+    client = ScriptClient(port, host)
+    steps = []
+
+    def check(step, result):
+        seconds, errors = result
+        if errors:
+            raise RuntimeError(f"{step}: {errors[0]}")
+        steps.append((step, seconds))
+
+    await client.connect()
+    try:
+        check("open", await client.rerun())
+        for lang in languages:
+            if lang != "en":
+                check(lang, await client.set_language(lang))
+            views = client.keyed("radio", VIEW_KEY)
+            if views is None:
+                continue
+            # Every view other than the one that just ran
+            shown = client.values.get(views.id, ("int_value", 0))[1]
+            for index in range(len(views.options)):
+                if index != shown:
+                    check(f"{lang} {views.options[index]}", await client.rerun(**{views.id: ("int_value", index)}))
+    finally:
+        client.close()
+    return steps
+
+
+class Readiness:
+    """Warm-up state for health checks: starting, warming, ready or failed"""
+
+    def __init__(self, ready_file=None):
+        self.ready_file = Path(ready_file) if ready_file else None
+        self.state = "starting"
+        self.detail = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self.set("starting")
+
+    def set(self, state, **detail):
+        with self._lock:
+            self.state = state
+            self.detail = detail
+        if self.ready_file is not None:
+            if state == "ready":
+                self.ready_file.write_text(json.dumps(self.report()), encoding="utf-8")
+            else:
+                self.ready_file.unlink(missing_ok=True)
+
+    @property
+    def ready(self):
+        return self.state == "ready"
+
+    def report(self):
+        with self._lock:
+            return {"state": self.state, "since_start": round(time.time() - self.started, 3), **self.detail}
+
+    def serve_http(self, port, address=""):
+        """Answer GET /ready with 200 once warm and 503 before; runs in a daemon thread"""
+        readiness = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") not in ("/ready", ""):
+                    self.send_error(404)
+                    return
+                body = json.dumps(readiness.report()).encode()
+                self.send_response(200 if readiness.ready else 503)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((address, port), Handler)
+        threading.Thread(target=server.serve_forever, name="readiness", daemon=True).start()
+        return server
+
+
+def wait_healthy(port, process, timeout=60, host="127.0.0.1"):
+    """Wait until the Streamlit server answers its health check"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"streamlit exited with code {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://{host}:{port}/_stcore/health", timeout=2):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError(f"streamlit did not start on port {port} within {timeout}s")
+
+
+def serve(script=SCRIPT, port=8501, ready_port=None, ready_file=None, streamlit_args=(), warm=True, timeout=60):
+    """Run the app with `streamlit run`, warm it up and wait for the server to exit"""
+    readiness = Readiness(ready_file)
+    if ready_port:
+        readiness.serve_http(ready_port)
+    process = subprocess.Popen([sys.executable, "-m", "streamlit", "run", script,
+                                "--server.port", str(port), "--server.headless", "true", *streamlit_args])
+    # Stop the server with the launcher, so a supervisor's SIGTERM reaches both
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+    try:
+        wait_healthy(port, process, timeout)
+        if warm:
+            readiness.set("warming")
+            start = time.perf_counter()
+            try:
+                steps = asyncio.run(warm_up(port))
+            except Exception as error:
+                # The server still serves visitors, it only reports that it is not warm
+                logger.error("warm-up failed: %s", error)
+                readiness.set("failed", error=str(error))
+            else:
+                seconds = time.perf_counter() - start
+                readiness.set("ready", warmup_seconds=round(seconds, 3),
+                              steps={step: round(elapsed, 3) for step, elapsed in steps})
+                print(f"Warm after {seconds:.2f}s: " + ", ".join(f"{step} {elapsed:.2f}s" for step, elapsed in steps),
+                      flush=True)
+        else:
+            readiness.set("ready")
+        return process.wait()
+    finally:
+        if process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        readiness.set("stopped")
+
+
+if __name__ == "__main__":
+    # Warm a server that is already running: python -m unidata.warmup [PORT]
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else int(os.environ.get("STREAMLIT_SERVER_PORT", 8501))
+    for step, seconds in asyncio.run(warm_up(port)):
+        print(f"{step:<24} {seconds * 1000:8.0f} ms")
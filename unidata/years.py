@@ -0,0 +1,95 @@
+"""Year-partitioned grants data and year over year comparisons
+
+Each NAEC release lives in its own directory, `data/<year>/grants.xlsx`, next
+to optional `universities.json` and `programs.json` for that year. The
+workbook in the repository root is the default year. Every partition has its
+own snapshot and artifacts keyed by the workbook's content hash, so adding a
+year only parses that year's file.
+
+Comparisons are built from each year's small grant totals, never from the
+student rows of several years at once.
+"""
+from pathlib import Path
+
+import pandas as pd
+
+from unidata.aggregation import COUNT_COLUMN, LEVEL_COLUMNS, MEAN_COLUMN, consolidate
+from unidata.ingest import SOURCE_PATH
+
+DATA_DIR = "data"
+DEFAULT_YEAR = 2025
+
+# Universities are matched across years by code, programs by name within a university,
+# the same rule the program ranking uses to merge programs
+COMPARE_KEYS = {"university": ["უსდ კოდი"], "program": ["უსდ კოდი", "პროგრამა"]}
+# Columns kept from each year's totals for display and translation
+LABEL_COLUMNS = {"university": ["უსდ"], "program": ["უსდ", "პროგ. კოდი"]}
+COMPARE_COLUMNS = [MEAN_COLUMN, *LEVEL_COLUMNS.values()]
+CHANGE_SUFFIX = "ცვლილება"
+
+
+def year_sources(data_dir=DATA_DIR, default_source=SOURCE_PATH, default_year=DEFAULT_YEAR):
+    """Workbook of each available year, oldest first"""
+    sources = {}
+    if Path(default_source).exists():
+        sources[default_year] = Path(default_source)
+    for path in Path(data_dir).glob(f"*/{Path(SOURCE_PATH).name}"):
+        if path.parent.name.isdigit():
+            sources[int(path.parent.name)] = path
+    return dict(sorted(sources.items()))
+
+
+def translations_dir(source):
+    """Directory of the translation files for a year's workbook, the root pair when it has none"""
+    directory = Path(source).parent
+    return directory if (directory / "programs.json").exists() else Path(".")
+
+
+def _plain_keys(table):
+    """Table with categorical columns turned back into plain values"""
+    categorical = {col: table[col].cat.categories.dtype for col in table.columns
+                   if isinstance(table[col].dtype, pd.CategoricalDtype)}
+    return table.astype(categorical) if categorical else table
+
+
+def year_totals(base, view):
+    """One year's grant totals per university or program, the unit comparisons are built from
+
+    base is the output of aggregation.base_aggregates for that year.
+    """
+    totals = _plain_keys(base[view])
+    keys = COMPARE_KEYS[view]
+    labels = totals.groupby(keys)[LABEL_COLUMNS[view]].first()
+    summary = consolidate(totals, keys).set_index(keys)
+    return labels.join(summary).reset_index()
+
+
+def year_over_year(yearly, view, year, min_students=0):
+    """Average grant and grant level counts of year next to the previous available year
+
+    yearly maps each year to its year_totals table. Columns are suffixed with
+    their year, and the change columns hold year minus the previous year.
+    Groups below min_students in a year count as missing for that year.
+    """
+    keys = COMPARE_KEYS[view]
+    earlier = [other for other in yearly if other < year]
+
+    current = yearly[year]
+    current = current[current[COUNT_COLUMN] >= min_students]
+    table = current[keys + LABEL_COLUMNS[view] + COMPARE_COLUMNS + [COUNT_COLUMN]]
+    table = table.rename(columns={col: f"{col} {year}" for col in COMPARE_COLUMNS + [COUNT_COLUMN]})
+    if not earlier:
+        return table.round({f"{MEAN_COLUMN} {year}": 2}).sort_values(f"{MEAN_COLUMN} {year}", ascending=False)
+
+    previous = max(earlier)
+    before = yearly[previous]
+    before = before[before[COUNT_COLUMN] >= min_students]
+    before = before[keys + COMPARE_COLUMNS].rename(columns={col: f"{col} {previous}" for col in COMPARE_COLUMNS})
+    table = table.merge(before, on=keys, how="left")
+    columns = keys + LABEL_COLUMNS[view]
+    for col in COMPARE_COLUMNS:
+        table[f"{col} {CHANGE_SUFFIX}"] = table[f"{col} {year}"] - table[f"{col} {previous}"]
+        columns += [f"{col} {previous}", f"{col} {year}", f"{col} {CHANGE_SUFFIX}"]
+    columns.append(f"{COUNT_COLUMN} {year}")
+    table = table.round({f"{MEAN_COLUMN} {suffix}": 2 for suffix in (previous, year, CHANGE_SUFFIX)})
+    return table[columns].sort_values(f"{MEAN_COLUMN} {year}", ascending=False)